@@ -1,50 +1,59 @@
 # %% Libs
-import json
 import pandas as pd
 from bs4 import BeautifulSoup
 # from func_timeout import func_set_timeout
 # from func_timeout import FunctionTimedOut
-from numpy import nan
 from random import sample
-from time import sleep
-from urllib.error import HTTPError
-from urllib.request import urlopen
-from tqdm import tqdm
+
+from issuer_scraper import IssuerScraper
 
 # %% Read in the examples
-class BmoScraper:
-    # Pass in note URLs & lookup for PDW
-    def __init__(self, bmo_urls):
-        self.notes_dict = {}
-        self.errors_dict = {}
-        for note in tqdm(bmo_urls):
-            try:
-                try:
-                    try:
-                        self.notes_dict[note.rsplit(
-                            '/', 1)[-1]] = pd.read_html(note)
-                        sleep(3)
-                    except HTTPError:
-                        print('HTTP Error: Waiting 10 seconds and trying again'
-                              ' for the current item')
-                        sleep(10)
-                        self.notes_dict[note.rsplit(
-                            '/', 1)[-1]] = pd.read_html(note)
-                        sleep(3)
-                except HTTPError:
-                    print('HTTP Error: Waiting 30 seconds and trying again'
-                          ' for the current item')
-                    sleep(30)
-                    self.notes_dict[note.rsplit('/',
-                                                1)[-1]] = pd.read_html(note)
-                    sleep(3)
-            except HTTPError:
-                message = (f'Note {note} failed to read after 3 attemps.  '
-                           'Logging for investigation.')
-                self.errors_dict[(note, '__init__')] = message
+class BmoScraper(IssuerScraper):
+    issuer = 'bmo'
+    hosts = ('www.bmonotes.com', 'bmonotes.com')
+    PREPARE_STEPS = [
+        'transpose_set_header',
+        'label_note_tables',
+        'set_pdw_index',
+    ]
+    RULES = [
+        '_PDW_Name',
+        '_callBarrierLevelFinal',
+        '_callObservationDateList',
+        '_callObservationFrequency',
+        '_callType',
+        '_numberNoCallPeriods',
+        '_currency',
+        '_cusip',
+        '_issueDate',
+        '_issuer',
+        '_maturityDate',
+        '_productName',
+        '_stage',
+        '_status',
+        '_tenorFinal',
+        '_tenorUnit',
+        '_underlierList',
+        '_underlierWeight',
+        '_upsideParticipationRateFinal',
+        '_principalBarrierLevelFinal',
+        '_paymentBarrierFinal',
+        '_paymentDateList',
+        '_paymentEvaluationFrequencyFinal',
+        '_paymentRatePerAnnumFinal',
+        '_paymentRatePerPeriodFinal',
+        '_fundservID',
+        '_mark_to_market_price',
+        '_minimumReturnFinal',
+        '_tradeDate',
+        '_callPremiumFinal',
+        '_putLeverageFinal',
+        '_extendibleNote',
+    ]
 
-        self.bmo_example_fields = pd.read_excel('BMO Examples.xlsx')
-        self.pdw_df = self.bmo_example_fields[['PDW Fields']].copy()
+    # Pass in note URLs & lookup for PDW
+    def __init__(self, bmo_urls, fetcher=None):
+        super().__init__(bmo_urls, fetcher)
         self.skip_cols = pd.Series(
             ['Payment Schedule', 'Portfolio Summary', 'Rates Schedule'])
 
@@ -401,9 +410,8 @@ class BmoScraper:
         # Get title of webpages
         try:
             for key, val in self.notes_dict.items():
-                soup = BeautifulSoup(urlopen('https://www.bmonotes.com/Note/' +
-                                             key),
-                                     features="lxml")
+                # The page was already downloaded with the note's tables
+                soup = BeautifulSoup(self.pages[key], features="lxml")
                 page_title = str(soup.find_all('h1')[1]).replace(
                     r'<h1>', '').replace(r'</h1>', '').strip()
                 self.pdw_df.at['productGeneral.productName', key] = page_title
@@ -908,158 +916,6 @@ class BmoScraper:
                 message = template.format(type(e).__name__, e.args)
                 self.errors_dict[(key, '_extendibleNote')] = (message, val)
 
-    # Run all rules
-    def run_all_rules(self):
-        self.transpose_set_header()
-        self.label_note_tables()
-        self.set_pdw_index()
-        self._PDW_Name()
-        self._callBarrierLevelFinal()
-        self._callObservationDateList()
-        self._callObservationFrequency()
-        self._callType()
-        self._numberNoCallPeriods()
-        self._currency()
-        self._cusip()
-        self._issueDate()
-        self._issuer()
-        self._maturityDate()
-        self._productName()
-        self._stage()
-        self._status()
-        self._tenorFinal()
-        self._tenorUnit()
-        self._underlierList()
-        self._underlierWeight()
-        self._upsideParticipationRateFinal()
-        self._principalBarrierLevelFinal()
-        self._paymentBarrierFinal()
-        self._paymentDateList()
-        self._paymentEvaluationFrequencyFinal()
-        self._paymentRatePerAnnumFinal()
-        self._paymentRatePerPeriodFinal()
-        self._fundservID()
-        self._mark_to_market_price()
-        self._minimumReturnFinal()
-        self._tradeDate()
-        self._callPremiumFinal()
-        self._putLeverageFinal()
-        self._extendibleNote()
-
-    def reset_pdw_indices(self):
-        # Reset indices to prepare to JSON
-        try:
-            self.pdw_insert_df = self.pdw_df.copy()
-            self.pdw_insert_df.drop(['PDW Name', 'Mark to Market Price'],
-                                    inplace=True)
-            self.pdw_insert_df.dropna(subset=self.pdw_df.columns,
-                                      how='all',
-                                      inplace=True)
-            self.pdw_insert_df.reset_index(inplace=True)
-        except Exception as e:
-            template = ("An exception of type {0} occurred. "
-                        "Arguments:\n{1!r}")
-            message = template.format(type(e).__name__, e.args)
-            self.errors_dict[(self.pdw_insert_df,
-                              'reset_pdw_indices')] = message
-
-    def process_pdw_dicts(self):
-        # Process for JSON
-        self.pdw_df_dict = {}
-        for col in self.pdw_df.columns:
-            try:
-                self.pdw_df_dict[col] = self.pdw_insert_df[['PDW Fields',
-                                                            col]].dropna()
-                self.pdw_df_dict[col] = pd.concat(
-                    [
-                        self.pdw_df_dict[col]['PDW Fields'].str.split(
-                            '.', expand=True), self.pdw_df_dict[col]
-                    ],
-                    axis=1,
-                )
-                self.pdw_df_dict[col].drop(columns='PDW Fields', inplace=True)
-            except Exception as e:
-                template = ("An exception of type {0} occurred. "
-                            "Arguments:\n{1!r}")
-                message = template.format(type(e).__name__, e.args)
-                self.errors_dict[(col, 'process_pdw_dicts')] = message
-
-    def gen_pdw_json(self):
-        # Convert to JSON & set up cxn
-        self.result = {}
-        for col in self.pdw_df_dict.keys():
-            try:
-                len_cols = list(range(len(self.pdw_df_dict[col].columns) - 1))
-                pdw_pre_insert = self.pdw_df_dict[col].set_index(
-                    len_cols).groupby(level=0).apply(
-                        lambda x: x.xs(x.name)[col].to_dict()).to_dict()
-
-                # Prepare underlier list
-                if ('underlierList',
-                        nan) in pdw_pre_insert['productGeneral'].keys() and (
-                            'underlierList', 'underlierWeight'
-                        ) in pdw_pre_insert['productGeneral'].keys():
-                    pdw_pre_insert['productGeneral']['underlierList'] = []
-                    for sym, weight in zip(
-                            pdw_pre_insert['productGeneral'][('underlierList',
-                                                              nan)],
-                            pdw_pre_insert['productGeneral'][(
-                                'underlierList', 'underlierWeight')]):
-                        pdw_pre_insert['productGeneral'][
-                            'underlierList'].append({
-                                'underlierSymbol':
-                                sym,
-                                'underlierWeight':
-                                weight,
-                                'underlierSource':
-                                'Bloomberg'
-                            })
-                    del pdw_pre_insert['productGeneral'][('underlierList',
-                                                          nan)]
-                    del pdw_pre_insert['productGeneral'][('underlierList',
-                                                          'underlierWeight')]
-
-                # Prepare final JSON
-                pdw_insert = {}
-                for key, val in pdw_pre_insert.items():
-                    pdw_insert[key] = {}
-                    for key2, val2 in val.items():
-                        if isinstance(key2, tuple):
-                            if isinstance(key2[1], str):
-                                pdw_insert[key][key2[0]] = {key2[1]: val2}
-                            else:
-                                pdw_insert[key][key2[0]] = val2
-                        else:
-                            pdw_insert[key][key2] = val2
-
-                # Final JSON assertions
-                required_fields = [
-                    'productProtection',
-                    'productCall',
-                    'productYield',
-                    'productGrowth',
-                ]
-                for field in required_fields:
-                    if field not in pdw_insert.keys():
-                        pdw_insert[field] = {}
-                if 'wrapperType' not in pdw_insert['productGeneral'].keys():
-                    pdw_insert['productGeneral']['wrapperType'] = 'Note'
-
-                # Export JSONS
-                self.result[col] = pdw_insert
-                self.result[col] = json.dumps(self.result[col])
-            except Exception as e:
-                template = ("An exception of type {0} occurred. "
-                            "Arguments:\n{1!r}")
-                message = template.format(type(e).__name__, e.args)
-                self.errors_dict[(col, 'insert_pdw_json_to_pdw')] = message
-
-    def output_jsons(self):
-        # The writing process as one method
-        self.reset_pdw_indices()
-        self.process_pdw_dicts()
-        self.gen_pdw_json()
-
 
 # %% Params
 # with open('urls_to_pdw.txt') as f:
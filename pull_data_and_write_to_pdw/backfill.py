@@ -0,0 +1,220 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+DEFAULT_BACKFILL_DIR = '/tmp/pdw_backfill'
+DEFAULT_SHARDS = 8
+# Notes scraped (and written to one payload file) at a time per shard
+DEFAULT_BATCH_SIZE = 50
+# Note pages per second across all shards, per issuer site
+DEFAULT_RATE = 4.0
+# Concurrent requests within one shard
+DEFAULT_SHARD_WORKERS = 2
+# Products handed to the poster at a time
+DEFAULT_POST_BATCH_SIZE = 100
+
+
+def read_note_codes(path):
+    """Note codes or urls from a file, one per line or in its first CSV column."""
+    codes = []
+    with open(path) as f:
+        for line in f:
+            code = line.split(',')[0].strip()
+            if code and not code.startswith('#'):
+                codes.append(code)
+    return codes
+
+
+def backfill_urls(codes):
+    """Canonical note urls for codes (BMO JHN codes or cusips) or urls, each once."""
+    from note_urls import NoteDeduper, bmo_note_url
+
+    return NoteDeduper().unique(code if '://' in code else bmo_note_url(code) for code in codes)
+
+
+def shard_of(url, shards):
+    # A stable hash, so a restarted backfill puts every url in the same shard
+    return int(hashlib.sha1(url.encode()).hexdigest(), 16) % shards
+
+
+def shard_dir(out_dir, shard):
+    return os.path.join(out_dir, f'shard={shard:04d}')
+
+
+def done_urls(directory):
+    """Urls recorded in a shard's finished payload files."""
+    urls = set()
+    for path in glob.glob(os.path.join(directory, 'part-*.json')):
+        with open(path) as f:
+            urls.update(json.load(f)['urls'])
+    return urls
+
+
+def _write_part(directory, part, urls, products, errors):
+    # The payload file doubles as the shard's checkpoint, so it is written
+    # whole or not at all
+    path = os.path.join(directory, f'part-{part:05d}.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'urls': urls, 'products': products, 'errors': errors}, f)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def run_shard(shard, urls, out_dir=DEFAULT_BACKFILL_DIR, batch_size=DEFAULT_BATCH_SIZE,
+              request_interval=DEFAULT_SHARDS / DEFAULT_RATE, max_workers=DEFAULT_SHARD_WORKERS,
+              price_root=None):
+    """Scrape one shard's urls in batches; returns (notes scraped, products).
+
+    Runs in its own process.  Urls already in the shard's payload files are
+    skipped, so a shard that was stopped picks up at its next batch.  With
+    price_root, bid prices go to the PriceStore there.
+    """
+    from issuer_scraper import NoteFetcher, failed_urls, group_urls_by_issuer, scrape_issuers
+    from note_urls import NoteDeduper
+    from price_store import PriceStore
+
+    directory = shard_dir(out_dir, shard)
+    os.makedirs(directory, exist_ok=True)
+    done = done_urls(directory)
+    part = len(glob.glob(os.path.join(directory, 'part-*.json')))
+    urls = [url for url in urls if url not in done]
+    deduper = NoteDeduper()
+    price_store = PriceStore(price_root) if price_root else None
+    fetchers = {}
+    products = 0
+    try:
+        for i in range(0, len(urls), batch_size):
+            batch = urls[i:i + batch_size]
+            urls_by_issuer = group_urls_by_issuer(batch)
+            for issuer in urls_by_issuer:
+                if issuer not in fetchers:
+                    fetchers[issuer] = NoteFetcher(max_workers, request_interval)
+            result, errors = scrape_issuers(urls_by_issuer, deduper=deduper, fetchers=fetchers,
+                                            price_store=price_store)
+            # Pages that couldn't be fetched are left out of the part, so a rerun
+            # tries them again
+            failed = failed_urls(urls_by_issuer, errors)
+            errors = {issuer: {repr(key): str(message) for key, message in issuer_errors.items()}
+                      for issuer, issuer_errors in errors.items()}
+            _write_part(directory, part, [url for url in batch if url not in failed], result, errors)
+            if price_store is not None:
+                # Other shards write to the store too, so run_backfill compacts
+                try:
+                    price_store.flush(compact=False)
+                except Exception as e:
+                    print(f'shard {shard}: could not save mark-to-market prices: {e!r}')
+            part += 1
+            products += len(result)
+            print(f'shard {shard}: {i + len(batch)}/{len(urls)} notes, {products} products')
+    finally:
+        for fetcher in fetchers.values():
+            fetcher.close()
+    return len(urls), products
+
+
+def run_backfill(codes, out_dir=DEFAULT_BACKFILL_DIR, shards=DEFAULT_SHARDS,
+                 batch_size=DEFAULT_BATCH_SIZE, rate=DEFAULT_RATE,
+                 shard_workers=DEFAULT_SHARD_WORKERS, price_root=None):
+    """Scrape every note in codes across `shards` worker processes.
+
+    Each shard gets a fixed slice of the notes and spaces its requests so
+    all shards together stay under `rate` pages per second per site.
+    Payloads land in out_dir/shard=NNNN/part-NNNNN.json for post_backfill.
+    """
+    urls = backfill_urls(codes)
+    by_shard = {}
+    for url in urls:
+        by_shard.setdefault(shard_of(url, shards), []).append(url)
+    request_interval = shards / rate
+    start = time.perf_counter()
+    scraped = products = 0
+    failed = {}
+    with ProcessPoolExecutor(max_workers=shards) as executor:
+        futures = {executor.submit(run_shard, shard, shard_urls, out_dir, batch_size,
+                                   request_interval, shard_workers, price_root): shard
+                   for shard, shard_urls in sorted(by_shard.items())}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                shard_scraped, shard_products = future.result()
+            except Exception as e:
+                # The shard's finished batches are kept; a rerun resumes it
+                failed[shard] = repr(e)
+                print(f'shard {shard} failed: {e!r}')
+                continue
+            scraped += shard_scraped
+            products += shard_products
+    if price_root:
+        from price_store import PriceStore
+
+        # Every shard is done, so each day's files can be merged
+        price_store = PriceStore(price_root)
+        for date in price_store.dates():
+            price_store.compact(date)
+    print(f'Scraped {scraped} of {len(urls)} notes into {products} products '
+          f'in {time.perf_counter() - start:.0f}s')
+    return {'notes': len(urls), 'scraped': scraped, 'products': products, 'failed_shards': failed}
+
+
+def payload_files(out_dir=DEFAULT_BACKFILL_DIR):
+    return sorted(glob.glob(os.path.join(out_dir, 'shard=*', 'part-*.json')))
+
+
+def post_backfill(poster, out_dir=DEFAULT_BACKFILL_DIR, batch_size=DEFAULT_POST_BATCH_SIZE):
+    """Post every payload file not posted yet.
+
+    A file is marked with a .posted file once its products are posted (or
+    queued for retry), so posting can also be stopped and restarted.
+    """
+    from pdw_schema import print_validation_report, validate_pdw_batch
+
+    summary = {'success': [], 'error': []}
+    for path in payload_files(out_dir):
+        if os.path.exists(path + '.posted'):
+            continue
+        with open(path) as f:
+            items = list(json.load(f)['products'].items())
+        for i in range(0, len(items), batch_size):
+            products, validation_errors = validate_pdw_batch(dict(items[i:i + batch_size]))
+            print_validation_report(validation_errors)
+            summary['error'] += sorted({key for keys in validation_errors.values() for key in keys})
+            for result in poster.post_products(products):
+                summary['success' if result['success'] else 'error'].append(result['key'])
+        open(path + '.posted', 'w').close()
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape and post the full history of notes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scrape = subparsers.add_parser('scrape', help='Scrape notes into payload files')
+    scrape.add_argument('codes', help='File of note codes or urls, one per line')
+    scrape.add_argument('--out', default=DEFAULT_BACKFILL_DIR)
+    scrape.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+    scrape.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    scrape.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Note pages per second per site, across all shards')
+    scrape.add_argument('--shard-workers', type=int, default=DEFAULT_SHARD_WORKERS)
+    scrape.add_argument('--prices', help='Also save bid prices to the PriceStore at this location')
+    post = subparsers.add_parser('post', help='Post the payload files to PDW')
+    post.add_argument('--out', default=DEFAULT_BACKFILL_DIR)
+    post.add_argument('--batch-size', type=int, default=DEFAULT_POST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == 'scrape':
+        run_backfill(read_note_codes(args.codes), args.out, args.shards, args.batch_size,
+                     args.rate, args.shard_workers, args.prices)
+    else:
+        from lambda_function import close_poster, get_poster
+
+        poster = get_poster()
+        try:
+            summary = post_backfill(poster, args.out, args.batch_size)
+        finally:
+            close_poster(poster)
+        print(f'{len(summary["success"])} posted, {len(summary["error"])} with errors')
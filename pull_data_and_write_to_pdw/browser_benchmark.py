@@ -0,0 +1,85 @@
+import argparse
+import time
+
+from browser_pool import CHROME_PROFILES
+from listing_backends import BMO_LISTING_URLS
+from load_test import percentile
+from new_product_identifier import Driver
+
+
+def browser_memory(browser):
+    """Resident memory in bytes of the Chrome processes behind a browser."""
+    import psutil
+
+    driver_process = psutil.Process(browser.service.process.pid)
+    total = 0
+    for process in driver_process.children(recursive=True):
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def time_pages(profile, url):
+    """Seconds for each pagination step of a BMO listing, and peak memory."""
+    driver = Driver(http_first=False, browser_profile=profile)
+    steps = []
+    memory = 0
+    try:
+        pages = driver.iter_bmo_product_pages([url])
+        while True:
+            start = time.perf_counter()
+            if next(pages, None) is None:
+                break
+            steps.append(time.perf_counter() - start)
+            memory = max(memory, browser_memory(driver.driver))
+    finally:
+        driver.close_driver()
+    return steps, memory
+
+
+def run_benchmark(profiles, urls, repeat):
+    """Crawl each listing with each profile through Selenium and report it."""
+    report = []
+    for profile in profiles:
+        steps = []
+        memory = []
+        for _ in range(repeat):
+            for url in urls:
+                url_steps, url_memory = time_pages(profile, url)
+                steps += url_steps
+                memory.append(url_memory)
+        report.append({
+            'profile': profile,
+            'pages': len(steps),
+            'seconds': sum(steps),
+            'p50': percentile(steps, 50),
+            'p95': percentile(steps, 95),
+            'memory_mb': max(memory) / 2 ** 20 if memory else 0.0,
+        })
+    return report
+
+
+def print_report(report):
+    print(f'{"profile":>10} {"pages":>6} {"total s":>8} {"p50 s":>7} '
+          f'{"p95 s":>7} {"peak MB":>8}')
+    for row in report:
+        print(f'{row["profile"]:>10} {row["pages"]:>6} {row["seconds"]:>8.1f} '
+              f'{row["p50"]:>7.2f} {row["p95"]:>7.2f} {row["memory_mb"]:>8.0f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compare per-page listing load times across browser profiles')
+    parser.add_argument('--profiles', default='headless,crawler')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--url', action='append',
+                        help='Listing to page through (default: every BMO listing)')
+    args = parser.parse_args()
+
+    profiles = args.profiles.split(',')
+    unknown = set(profiles) - set(CHROME_PROFILES)
+    if unknown:
+        parser.error(f'Unknown profiles: {", ".join(sorted(unknown))}')
+    print_report(run_benchmark(profiles, args.url or BMO_LISTING_URLS, args.repeat))
@@ -0,0 +1,183 @@
+import atexit
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+CHROME_PATH = r"/opt/homebrew/bin/chromedriver"
+DEFAULT_POOL_SIZE = 4
+# Profile the listing crawls use; 'headless' is the plain one to compare with
+DEFAULT_PROFILE = 'crawler'
+# Chrome arguments per browser profile
+CHROME_PROFILES = {
+    'headless': ['--headless'],
+    'crawler': ['--headless', '--blink-settings=imagesEnabled=false', '--disable-extensions',
+                '--disable-gpu', '--mute-audio'],
+    # Desjardins' splash page only works in a full-size, non-headless window
+    'desktop': ['--window-size=1920,1080'],
+}
+CHROME_PREFS = {
+    'crawler': {'profile.managed_default_content_settings.images': 2},
+    'desktop': {'profile.managed_default_content_settings.javascript': 1},
+}
+# 'eager' returns from get() once the DOM is parsed; the readiness checks wait
+# for the listing rows themselves
+PAGE_LOAD_STRATEGIES = {
+    'crawler': 'eager',
+}
+# Requests a profile never makes, as Network.setBlockedURLs patterns.  The
+# listings are read from the DOM, so nothing is lost but download time and memory
+BLOCKED_URL_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'stylesheet': ['*.css'],
+    'media': ['*.mp4', '*.webm', '*.mp3'],
+    # Analytics, tag managers, ads and chat widgets on the issuer sites
+    'third_party': ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+                    '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*adobedtm.com*',
+                    '*omtrdc.net*', '*demdex.net*', '*linkedin.com/px*', '*bing.com/bat*',
+                    '*newrelic.com*', '*nr-data.net*', '*onetrust.com*', '*cookielaw.org*'],
+}
+BLOCKED_RESOURCES = {
+    'crawler': ['image', 'font', 'stylesheet', 'media', 'third_party'],
+}
+
+
+def blocked_urls(profile):
+    return [pattern for resource in BLOCKED_RESOURCES.get(profile, [])
+            for pattern in BLOCKED_URL_PATTERNS[resource]]
+
+
+def new_chrome(profile=DEFAULT_PROFILE):
+    from selenium import webdriver
+
+    op = webdriver.ChromeOptions()
+    for argument in CHROME_PROFILES[profile]:
+        op.add_argument(argument)
+    if profile in CHROME_PREFS:
+        op.add_experimental_option("prefs", CHROME_PREFS[profile])
+    capabilities = {'pageLoadStrategy': PAGE_LOAD_STRATEGIES.get(profile, 'normal')}
+    browser = webdriver.Chrome(CHROME_PATH, options=op, desired_capabilities=capabilities)
+    blocked = blocked_urls(profile)
+    if blocked:
+        browser.execute_cdp_cmd('Network.enable', {})
+        browser.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked})
+    browser.pool_profile = profile
+    return browser
+
+
+# Pools not closed yet; held weakly so a dropped pool can be collected
+_open_pools = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_pools():
+    for pool in list(_open_pools):
+        pool.close()
+
+
+def _quit(browser):
+    try:
+        browser.quit()
+    except Exception:
+        # Already dead; nothing left to clean up
+        pass
+
+
+class BrowserPool:
+    """A bounded set of Chrome instances shared by concurrent crawls.
+
+    At most `size` browsers are leased at once; acquire blocks until one is
+    free.  Idle headless (and crawler) browsers are kept warm and health-checked before they
+    are handed out again, and a browser released as broken (or found dead) is
+    quit and replaced.  Every browser is quit on close() or at exit.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, browser_factory=new_chrome):
+        self.size = size
+        self.browser_factory = browser_factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._all = set()
+        self._closed = False
+        _open_pools.add(self)
+
+    def _start(self, profile):
+        browser = self.browser_factory(profile)
+        with self._lock:
+            self._all.add(browser)
+        return browser
+
+    def _discard(self, browser):
+        with self._lock:
+            self._all.discard(browser)
+        _quit(browser)
+
+    @staticmethod
+    def _is_alive(browser):
+        try:
+            browser.current_url
+            return True
+        except Exception:
+            return False
+
+    def warm(self, count=None, profile=DEFAULT_PROFILE):
+        """Start up to `count` browsers in parallel ahead of use."""
+        count = min(self.size, self.size if count is None else count)
+        with self._lock:
+            count -= len(self._idle)
+        if count <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            browsers = list(executor.map(lambda _: self._start(profile), range(count)))
+        with self._lock:
+            self._idle.extend(browsers)
+
+    def acquire(self, profile=DEFAULT_PROFILE):
+        if self._closed:
+            raise RuntimeError('BrowserPool is closed')
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    browser = next((b for b in self._idle if b.pool_profile == profile), None)
+                    if browser is not None:
+                        self._idle.remove(browser)
+                if browser is None:
+                    return self._start(profile)
+                if self._is_alive(browser):
+                    return browser
+                # Crashed while idle
+                self._discard(browser)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, browser, broken=False):
+        """Return a leased browser; broken ones are quit instead of reused."""
+        try:
+            # Only headless browsers are worth keeping warm
+            if broken or self._closed or browser.pool_profile == 'desktop':
+                self._discard(browser)
+            else:
+                with self._lock:
+                    self._idle.append(browser)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        _open_pools.discard(self)
+        with self._lock:
+            browsers = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+        for browser in browsers:
+            _quit(browser)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,7 +1,10 @@
+import os
 import requests
 import json
 
 
+PDW_PRODUCTS_URL = os.environ.get(
+    'PDW_PRODUCTS_URL', "https://scg.buat.lumafintech.com/api/pdw-service/v2/products/")
 
 result = {'errors':[],'success':[]}
 
@@ -9,7 +12,7 @@ result = {'errors':[],'success':[]}
 def call_luma_product_api(product, new_access_token):
     """Post new product to pdw api and save the response in xls files."""
     print("Inside call_luma_product_api")
-    url = "https://scg.buat.lumafintech.com/api/pdw-service/v2/products/"
+    url = PDW_PRODUCTS_URL
 
     payload = json.dumps(product)
     headers = {
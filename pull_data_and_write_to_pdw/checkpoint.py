@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_CHECKPOINT_LOCATION = os.environ.get(
+    'PIPELINE_CHECKPOINT', '/tmp/pdw_pipeline_checkpoint.json')
+# Minimum seconds between writes; forced saves ignore it
+DEFAULT_SAVE_INTERVAL = 5
+
+
+def _empty_state():
+    return {
+        'crawl_complete': False,
+        'discovered_urls': [],
+        'scraped_urls': [],
+        'scraped': {},
+        'posted': [],
+    }
+
+
+class PipelineCheckpoint:
+    """Pipeline progress persisted to a local file or an s3:// URI.
+
+    Tracks the note URLs the crawl discovered, the URLs already scraped with
+    their payloads, and the product keys already posted (or handed to the
+    retry queue), so an interrupted run can resume where it stopped.
+    """
+
+    def __init__(self, location=DEFAULT_CHECKPOINT_LOCATION,
+                 save_interval=DEFAULT_SAVE_INTERVAL):
+        self.location = location
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = 0
+        self.state = self._read() or _empty_state()
+        self._discovered = set(self.state['discovered_urls'])
+        self._scraped_urls = set(self.state['scraped_urls'])
+        self._posted = set(self.state['posted'])
+
+    def _s3_object(self):
+        import boto3
+
+        bucket, key = self.location[len('s3://'):].split('/', 1)
+        return boto3.resource('s3').Object(bucket, key)
+
+    def _read(self):
+        if self.location.startswith('s3://'):
+            import botocore
+
+            try:
+                body = self._s3_object().get()['Body'].read()
+            except botocore.exceptions.ClientError:
+                return None
+            return json.loads(body)
+        if not os.path.exists(self.location):
+            return None
+        with open(self.location) as f:
+            return json.load(f)
+
+    def save(self, force=False):
+        # Serialise writers so an older snapshot never lands after a newer one
+        with self._save_lock:
+            with self._lock:
+                if (not force
+                        and time.time() - self._last_save < self.save_interval):
+                    return
+                body = json.dumps(self.state)
+                self._last_save = time.time()
+            if self.location.startswith('s3://'):
+                self._s3_object().put(Body=body.encode())
+            else:
+                tmp_path = self.location + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    f.write(body)
+                os.replace(tmp_path, self.location)
+
+    def clear(self):
+        """Forget all progress, e.g. after a run completed."""
+        with self._lock:
+            self.state = _empty_state()
+            self._discovered = set()
+            self._scraped_urls = set()
+            self._posted = set()
+        if self.location.startswith('s3://'):
+            self._s3_object().delete()
+        elif os.path.exists(self.location):
+            os.remove(self.location)
+
+    @property
+    def crawl_complete(self):
+        return self.state['crawl_complete']
+
+    def is_discovered(self, url):
+        return url in self._discovered
+
+    def mark_discovered(self, urls):
+        with self._lock:
+            for url in urls:
+                if url not in self._discovered:
+                    self._discovered.add(url)
+                    self.state['discovered_urls'].append(url)
+        self.save()
+
+    def mark_crawl_complete(self):
+        with self._lock:
+            self.state['crawl_complete'] = True
+        self.save(force=True)
+
+    def mark_scraped(self, urls, products):
+        """Record scraped URLs and the {key: payload} they produced."""
+        with self._lock:
+            for url in urls:
+                if url not in self._scraped_urls:
+                    self._scraped_urls.add(url)
+                    self.state['scraped_urls'].append(url)
+            self.state['scraped'].update(products)
+        self.save()
+
+    def mark_posted(self, keys):
+        with self._lock:
+            for key in keys:
+                if key not in self._posted:
+                    self._posted.add(key)
+                    self.state['posted'].append(key)
+                # The payload isn't needed once it's posted
+                self.state['scraped'].pop(key, None)
+        self.save()
+
+    def pending_urls(self):
+        """Discovered URLs that have not been scraped yet."""
+        with self._lock:
+            return [url for url in self.state['discovered_urls']
+                    if url not in self._scraped_urls]
+
+    def unposted_products(self):
+        """Scraped {key: payload} that have not been posted yet."""
+        with self._lock:
+            return {key: product
+                    for key, product in self.state['scraped'].items()
+                    if key not in self._posted}
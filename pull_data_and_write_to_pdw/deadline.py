@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+# Seconds kept in reserve for saving the checkpoint and shutting down
+DEFAULT_SAFETY_MARGIN = 30
+# Starting per-item estimates (seconds) until real timings come in
+DEFAULT_COSTS = {
+    'page': 5.0,
+    'scrape': 6.0,
+    'post': 1.0,
+}
+
+
+class Deadline:
+    """Remaining time budget of the current invocation.
+
+    Built from a Lambda context (its get_remaining_time_in_millis) or from a
+    number of seconds; with neither, the budget is unlimited.
+    """
+
+    def __init__(self, seconds=None, context=None,
+                 safety_margin=DEFAULT_SAFETY_MARGIN):
+        self.context = context
+        self.safety_margin = safety_margin
+        self._expires_at = (time.monotonic() + seconds
+                            if seconds is not None else None)
+
+    def remaining(self):
+        if self.context is not None:
+            return self.context.get_remaining_time_in_millis() / 1000
+        if self._expires_at is not None:
+            return self._expires_at - time.monotonic()
+        return float('inf')
+
+    def has_time_for(self, seconds):
+        """Whether `seconds` of work fits before the safety margin."""
+        return self.remaining() - self.safety_margin >= seconds
+
+
+class CostEstimator:
+    """Per-item cost of each pipeline stage from recent timings.
+
+    Keeps an exponentially weighted moving average so the estimate follows
+    the site's current speed.
+    """
+
+    def __init__(self, defaults=None, alpha=0.3):
+        self.alpha = alpha
+        self.costs = dict(DEFAULT_COSTS, **(defaults or {}))
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, items=1):
+        if items <= 0:
+            return
+        per_item = seconds / items
+        with self._lock:
+            previous = self.costs.get(stage, per_item)
+            self.costs[stage] = (self.alpha * per_item
+                                 + (1 - self.alpha) * previous)
+
+    def estimate(self, stage, items=1):
+        with self._lock:
+            return self.costs.get(stage, 0.0) * items
@@ -0,0 +1,53 @@
+import pandas as pd
+from numpy import nan
+
+
+# Header, cell text and row link of one table in a single round trip.
+# arguments: table selector, table index, header cell selector (document
+# scope, optional), link selector (row scope, optional)
+_EXTRACT_TABLE_JS = '''
+var table = document.querySelectorAll(arguments[0])[arguments[1]];
+if (!table) { return null; }
+var text = function (cell) { return cell.innerText.trim(); };
+var columns = arguments[2]
+    ? Array.prototype.map.call(document.querySelectorAll(arguments[2]), text)
+    : Array.prototype.map.call(table.querySelectorAll('thead th'), text);
+var rows = [];
+var links = [];
+for (var i = 0; i < table.rows.length; i++) {
+    var row = table.rows[i];
+    var section = row.parentNode.tagName;
+    if (section === 'THEAD' || section === 'TFOOT') { continue; }
+    var cells = Array.prototype.map.call(row.cells, text);
+    if (!columns.length && !rows.length && row.querySelector('th')) {
+        columns = cells;
+        continue;
+    }
+    rows.push(cells);
+    var link = arguments[3] ? row.querySelector(arguments[3]) : null;
+    links.push(link ? link.href : null);
+}
+return {columns: columns, rows: rows, links: links};
+'''
+
+
+def extract_table(driver, table_selector='table', index=0, header_selector=None, link_selector=None):
+    """Read a whole table from the live page with one execute_script call.
+
+    Replaces re-parsing page_source with pd.read_html and looking up each
+    row's link with its own find_element call.  Cells come back as text,
+    with empty cells as NaN; rows shorter than the header (colspans) are
+    padded.  With link_selector, the absolute href of the first match in each
+    row goes in a 'urls' column.
+    """
+    table = driver.execute_script(_EXTRACT_TABLE_JS, table_selector, index, header_selector, link_selector)
+    if table is None:
+        raise ValueError(f'No table matching {table_selector!r} at index {index}')
+    width = max([len(table['columns'])] + [len(row) for row in table['rows']])
+    columns = list(table['columns']) + list(range(len(table['columns']), width))
+    rows = [row + [nan] * (width - len(row)) for row in table['rows']]
+    frame = pd.DataFrame(rows, columns=columns).replace('', nan)
+    if link_selector is not None:
+        frame['urls'] = table['links']
+
+    return frame
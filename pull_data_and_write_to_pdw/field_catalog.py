@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+
+
+CATALOG_FORMAT_VERSION = 1
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATALOG_PATH = os.path.join(MODULE_DIR, 'pdw_field_catalog.json')
+DEFAULT_SOURCE_PATH = os.path.join(MODULE_DIR, 'BMO Examples.xlsx')
+
+# Types of the values the scraper rules write for each PDW field.  Fields that
+# are missing here are typed from product.json when the catalog is compiled.
+FIELD_TYPES = {
+    'PDW Name': 'string',
+    'Mark to Market Price': 'number',
+    'productCall.callBarrierLevelFinal': 'number',
+    'productCall.callObservationDateList': 'array',
+    'productCall.callObservationFrequency': 'string',
+    'productCall.callPremiumFinal': 'number',
+    'productCall.callType': 'string',
+    'productCall.numberNoCallPeriods': 'integer',
+    'productGeneral.currency': 'string',
+    'productGeneral.cusip': 'string',
+    'productGeneral.fundservID': 'string',
+    'productGeneral.isin': 'string',
+    'productGeneral.issueDate': 'date',
+    'productGeneral.issuer': 'string',
+    'productGeneral.maturityDate': 'date',
+    'productGeneral.productName': 'string',
+    'productGeneral.registrationType': 'string',
+    'productGeneral.stage': 'string',
+    'productGeneral.status': 'string',
+    'productGeneral.tenorFinal': 'number',
+    'productGeneral.tenorUnit': 'string',
+    'productGeneral.tradeDate': 'date',
+    'productGeneral.underlierList': 'array',
+    'productGeneral.underlierList.underlierWeight': 'number',
+    'productGrowth.minimumReturnFinal': 'number',
+    'productGrowth.upsideParticipationRateFinal': 'number',
+    'productProtection.downsideType': 'string',
+    'productProtection.principalBarrierLevelFinal': 'number',
+    'productProtection.principalBufferLevelFinal': 'number',
+    'productProtection.protectionLevel': 'number',
+    'productProtection.putLeverageFinal': 'number',
+    'productProtection.putStrikeFinal': 'number',
+    'productYield.paymentBarrierFinal': 'number',
+    'productYield.paymentDateList': 'array',
+    'productYield.paymentEvaluationFrequencyFinal': 'string',
+    'productYield.paymentFrequency': 'string',
+    'productYield.paymentRatePerAnnumFinal': 'number',
+    'productYield.paymentRatePerPeriodFinal': 'number',
+}
+
+
+class FieldCatalog:
+    """PDW fields in spreadsheet order with their type and nesting path."""
+
+    def __init__(self, catalog):
+        if catalog.get('format_version') != CATALOG_FORMAT_VERSION:
+            raise ValueError('Unsupported field catalog format version '
+                             f'{catalog.get("format_version")!r}')
+        self.catalog_id = catalog['catalog_id']
+        self.source = catalog['source']
+        self.fields = catalog['fields']
+        self._by_name = {field['name']: field for field in self.fields}
+
+    @property
+    def names(self):
+        return [field['name'] for field in self.fields]
+
+    @property
+    def payload_fields(self):
+        # Fields without a section (e.g. 'PDW Name') are scraper bookkeeping
+        return [field for field in self.fields if len(field['path']) > 1]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+
+def _example_types():
+    """Map dotted product.json fields to catalog types."""
+    with open(os.path.join(MODULE_DIR, 'product.json')) as f:
+        example = json.load(f)
+
+    types = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, val in value.items():
+                walk(prefix + [key], val)
+        elif isinstance(value, bool):
+            types['.'.join(prefix)] = 'boolean'
+        elif isinstance(value, (int, float)):
+            types['.'.join(prefix)] = 'number'
+        elif isinstance(value, list):
+            types['.'.join(prefix)] = 'array'
+        else:
+            types['.'.join(prefix)] = 'string'
+
+    walk([], example)
+    return types
+
+
+def compile_field_catalog(source_path=DEFAULT_SOURCE_PATH,
+                          catalog_path=DEFAULT_CATALOG_PATH):
+    """Compile the 'PDW Fields' column of the examples workbook to JSON."""
+    import pandas as pd
+
+    names = pd.read_excel(source_path)['PDW Fields'].dropna().astype(
+        str).str.strip().drop_duplicates().to_list()
+    example_types = _example_types()
+    fields = [{
+        'name': name,
+        'path': name.split('.'),
+        'type': FIELD_TYPES.get(name, example_types.get(name, 'string')),
+    } for name in names]
+    catalog = {
+        'format_version': CATALOG_FORMAT_VERSION,
+        'catalog_id': hashlib.sha256(json.dumps(
+            fields, sort_keys=True).encode()).hexdigest()[:16],
+        'source': os.path.basename(source_path),
+        'fields': fields,
+    }
+    with open(catalog_path, 'w') as f:
+        json.dump(catalog, f, indent=2)
+        f.write('\n')
+    load_field_catalog.cache_clear()
+
+    return catalog
+
+
+@lru_cache(maxsize=None)
+def load_field_catalog(catalog_path=DEFAULT_CATALOG_PATH):
+    """Load the compiled catalog once per process."""
+    with open(catalog_path) as f:
+        return FieldCatalog(json.load(f))
+
+
+if __name__ == '__main__':
+    # Usage: python field_catalog.py ["BMO Examples.xlsx"] [catalog.json]
+    catalog = compile_field_catalog(*sys.argv[1:3])
+    print(f'Compiled {len(catalog["fields"])} fields '
+          f'(catalog {catalog["catalog_id"]})')
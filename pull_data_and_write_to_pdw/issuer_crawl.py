@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from browser_pool import DEFAULT_POOL_SIZE, DEFAULT_PROFILE, BrowserPool
+from issuer_scraper import scrape_issuers
+from listing_backends import BMO_LISTING_URLS
+from new_product_identifier import Driver
+from note_urls import NoteAliases, NoteDeduper
+
+
+ISSUERS = ['bmo', 'nbcss', 'rbc', 'desjardins', 'nosco']
+# Listings that always need a headless browser, even with HTTP first
+SELENIUM_ONLY = {'bmo', 'rbc'}
+# A listing whose browser fails is retried once on a fresh browser
+MAX_ATTEMPTS = 2
+
+
+def listing_tasks(issuers=ISSUERS):
+    """(issuer, name, fetch) for every listing that can be crawled on its own.
+
+    BMO's three product-type listings are separate tasks; every other issuer
+    is one.  fetch takes a Driver and returns the listing's DataFrame.
+    """
+    tasks = []
+    for issuer in issuers:
+        if issuer == 'bmo':
+            for url in BMO_LISTING_URLS:
+                tasks.append((issuer, url, lambda driver, url=url: driver.get_bmo_products([url])))
+        else:
+            tasks.append((issuer, issuer, getattr(Driver, f'get_{issuer}_products')))
+    return tasks
+
+
+def crawl_listing(pool, fetch, attempts=MAX_ATTEMPTS, **driver_kwargs):
+    """Run fetch on a Driver leasing from pool, retrying on browser failure."""
+    from selenium.common.exceptions import WebDriverException
+
+    for attempt in range(1, attempts + 1):
+        driver = Driver(browser_pool=pool, **driver_kwargs)
+        broken = False
+        try:
+            return fetch(driver)
+        except WebDriverException as e:
+            # The browser may have crashed; it's replaced rather than reused
+            broken = True
+            if attempt == attempts:
+                raise
+            print(f'Browser failed ({e.__class__.__name__}), retrying on a fresh one')
+        finally:
+            driver.close_driver(broken=broken)
+
+
+def crawl_issuers(issuers=ISSUERS, pool=None, pool_size=DEFAULT_POOL_SIZE, http_first=True, readiness=None,
+                  browser_profile=DEFAULT_PROFILE):
+    """Crawl every listing of the given issuers in parallel.
+
+    Listings share a BrowserPool, so at most pool_size browsers run at once
+    and the total time approaches that of the slowest listing.  Returns
+    {issuer: DataFrame} and {issuer: exception} for issuers that failed.
+    """
+    tasks = listing_tasks(issuers)
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(pool_size)
+    try:
+        # Warm the browsers that will certainly be needed
+        pool.warm(sum(1 for issuer, _, _ in tasks
+                      if issuer != 'desjardins' and (issuer in SELENIUM_ONLY or not http_first)),
+                  browser_profile)
+        start = time.perf_counter()
+
+        def run(task):
+            issuer, name, fetch = task
+            task_start = time.perf_counter()
+            listing = crawl_listing(pool, fetch, http_first=http_first, readiness=readiness,
+                                    browser_profile=browser_profile)
+            print(f'{name}: {len(listing)} products in {time.perf_counter() - task_start:.1f}s')
+            return listing
+
+        with ThreadPoolExecutor(max_workers=len(tasks) or 1) as executor:
+            futures = [(task[0], executor.submit(run, task)) for task in tasks]
+        listings = {}
+        errors = {}
+        for issuer, future in futures:
+            if issuer in errors:
+                continue
+            try:
+                listings.setdefault(issuer, []).append(future.result())
+            except Exception as e:
+                errors[issuer] = e
+                listings.pop(issuer, None)
+        print(f'Crawled {len(tasks)} listings in {time.perf_counter() - start:.1f}s')
+    finally:
+        if own_pool:
+            pool.close()
+
+    return {issuer: pd.concat(frames, ignore_index=True) for issuer, frames in listings.items()}, errors
+
+
+if __name__ == '__main__':
+    driver = Driver()
+    aliases = NoteAliases()
+    pdw_index = None
+    try:
+        pdw_index = driver.get_pdw_identifier_index()
+        listings, errors = crawl_issuers()
+        # One deduper for the run, so each note is scraped once
+        deduper = NoteDeduper(aliases)
+        new_urls = {issuer: driver.compare_site_to_pdw(issuer, listing, pdw_index, deduper)
+                    for issuer, listing in listings.items()}
+        for issuer, error in errors.items():
+            print(f'{issuer} failed: {error!r}')
+        # Scrape every issuer's new notes in one concurrent run
+        products, scrape_errors = scrape_issuers(new_urls, deduper=deduper)
+        print(f'Scraped {len(products)} products')
+        for issuer, issuer_errors in scrape_errors.items():
+            print(f'{issuer}: {len(issuer_errors)} scrape errors')
+    finally:
+        driver.close_driver()
+        aliases.close()
+        if pdw_index is not None:
+            pdw_index.close()
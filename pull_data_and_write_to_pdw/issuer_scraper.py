@@ -0,0 +1,401 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import StringIO
+
+import pandas as pd
+import requests
+from numpy import nan
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+from field_catalog import load_field_catalog
+from listing_backends import USER_AGENT
+from note_urls import NoteDeduper, canonical_url
+
+
+DEFAULT_MAX_WORKERS = 4
+# Minimum seconds between two requests to the same issuer site
+DEFAULT_REQUEST_INTERVAL = 0.5
+# Waits before each retry of a failed note page, as the scraper always did
+RETRY_WAITS = (10, 30)
+DEFAULT_TIMEOUT = 30
+PARSE_CACHE_SIZE = 256
+
+
+class ParseCache:
+    """Parsed tables of recently seen pages, keyed by a hash of the HTML.
+
+    Rules modify the tables in place, so every caller gets its own copies.
+    """
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._tables = OrderedDict()
+
+    def read_html(self, html):
+        digest = hashlib.sha256(html.encode()).hexdigest()
+        with self._lock:
+            tables = self._tables.get(digest)
+            if tables is not None:
+                self._tables.move_to_end(digest)
+        if tables is None:
+            tables = pd.read_html(StringIO(html))
+            with self._lock:
+                self._tables[digest] = tables
+                if len(self._tables) > self.maxsize:
+                    self._tables.popitem(last=False)
+        return [table.copy() for table in tables]
+
+
+PARSE_CACHE = ParseCache()
+
+
+class NoteFetcher:
+    """Download note pages concurrently over one pooled session.
+
+    Requests to a site are spaced at least request_interval apart, and a page
+    that fails is retried after each of RETRY_WAITS.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, request_interval=DEFAULT_REQUEST_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT, session=None):
+        self.max_workers = max_workers
+        self.request_interval = request_interval
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self._next_request = 0
+
+    def _wait_turn(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.request_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def fetch(self, url):
+        for wait in RETRY_WAITS + (None,):
+            self._wait_turn()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                return response.text
+            except requests.RequestException:
+                if wait is None:
+                    raise
+                print(f'HTTP Error: Waiting {wait} seconds and trying again for {url}')
+                time.sleep(wait)
+
+    def fetch_all(self, urls):
+        """Yield (url, html or exception) as each page finishes."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch, url): url for url in urls}
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                url = futures[future]
+                try:
+                    yield url, future.result()
+                except requests.RequestException as e:
+                    yield url, e
+
+    def close(self):
+        self.session.close()
+
+
+class IssuerScraper:
+    """Turn one issuer's note pages into PDW payloads.
+
+    The fetcher, parse cache and payload builder are shared; an issuer's rule
+    pack subclasses this with note_key, PREPARE_STEPS and RULES (method
+    names run in order by run_all_rules), and the rules fill self.pdw_df with
+    one column per note and one row per PDW field.
+    """
+
+    issuer = None
+    # Product pages on these hosts belong to this issuer
+    hosts = ()
+    # Whether the pack is verified for posting; scrape_issuers skips it if not
+    post_payloads = True
+    max_workers = DEFAULT_MAX_WORKERS
+    request_interval = DEFAULT_REQUEST_INTERVAL
+    PREPARE_STEPS = []
+    RULES = []
+
+    def __init__(self, urls, fetcher=None, parse_cache=PARSE_CACHE):
+        self.notes_dict = {}
+        self.pages = {}
+        self.errors_dict = {}
+        # Spellings of the same page are fetched once
+        self.urls = {}
+        for url in map(canonical_url, urls):
+            self.urls.setdefault(self.note_key(url), url)
+        # A fetcher made here is closed here; a caller's outlives this scrape
+        own_fetcher = fetcher is None
+        fetcher = fetcher or NoteFetcher(self.max_workers, self.request_interval)
+        try:
+            for url, html in fetcher.fetch_all(self.urls.values()):
+                key = self.note_key(url)
+                if isinstance(html, Exception):
+                    message = (f'Note {url} failed to read after {len(RETRY_WAITS) + 1} attemps.  '
+                               'Logging for investigation.')
+                    self.errors_dict[(url, '__init__')] = message
+                    continue
+                try:
+                    self.notes_dict[key] = parse_cache.read_html(html)
+                    self.pages[key] = html
+                except ValueError as e:
+                    # pd.read_html found no tables
+                    self.errors_dict[(url, 'read_html')] = f'Note {url} has no tables: {e}'
+        finally:
+            if own_fetcher:
+                fetcher.close()
+
+        # Compiled from 'BMO Examples.xlsx' and shared across instances
+        self.field_catalog = load_field_catalog()
+        self.pdw_df = pd.DataFrame({'PDW Fields': self.field_catalog.names})
+
+    def note_key(self, url):
+        return url.rsplit('/', 1)[-1]
+
+    # Run all rules
+    def run_all_rules(self):
+        for step in self.PREPARE_STEPS + self.RULES:
+            getattr(self, step)()
+
+    def drop_duplicate_notes(self, deduper):
+        # A page whose cusip or isin another url already claimed is an alias
+        # of that note, so it isn't turned into a second payload
+        for key, url in self.urls.items():
+            if key not in self.pdw_df.columns:
+                continue
+            identifiers = [self.pdw_df.at[field, key] for field in
+                           ('productGeneral.cusip', 'productGeneral.isin')
+                           if field in self.pdw_df.index]
+            owner = deduper.same_note(url, identifiers)
+            if owner is not None:
+                print(f'{url} is the same note as {owner}; skipping it')
+                self.pdw_df.drop(columns=key, inplace=True)
+
+    def mark_to_market_prices(self):
+        """{key: bid price} of the notes whose page showed one."""
+        if 'Mark to Market Price' not in self.pdw_df.index:
+            return {}
+        return self.pdw_df.loc['Mark to Market Price'].dropna().to_dict()
+
+    def reset_pdw_indices(self):
+        # Reset indices to prepare to JSON
+        try:
+            self.pdw_insert_df = self.pdw_df.copy()
+            self.pdw_insert_df.drop(['PDW Name', 'Mark to Market Price'],
+                                    inplace=True, errors='ignore')
+            self.pdw_insert_df.dropna(subset=self.pdw_df.columns,
+                                      how='all',
+                                      inplace=True)
+            self.pdw_insert_df.reset_index(inplace=True)
+        except Exception as e:
+            template = ("An exception of type {0} occurred. "
+                        "Arguments:\n{1!r}")
+            message = template.format(type(e).__name__, e.args)
+            self.errors_dict[(self.pdw_insert_df,
+                              'reset_pdw_indices')] = message
+
+    def process_pdw_dicts(self):
+        # Process for JSON
+        self.pdw_df_dict = {}
+        for col in self.pdw_df.columns:
+            try:
+                self.pdw_df_dict[col] = self.pdw_insert_df[['PDW Fields',
+                                                            col]].dropna()
+                self.pdw_df_dict[col] = pd.concat(
+                    [
+                        self.pdw_df_dict[col]['PDW Fields'].str.split(
+                            '.', expand=True), self.pdw_df_dict[col]
+                    ],
+                    axis=1,
+                )
+                self.pdw_df_dict[col].drop(columns='PDW Fields', inplace=True)
+            except Exception as e:
+                template = ("An exception of type {0} occurred. "
+                            "Arguments:\n{1!r}")
+                message = template.format(type(e).__name__, e.args)
+                self.errors_dict[(col, 'process_pdw_dicts')] = message
+
+    def gen_pdw_json(self):
+        # Convert to JSON & set up cxn
+        self.result = {}
+        for col in self.pdw_df_dict.keys():
+            try:
+                len_cols = list(range(len(self.pdw_df_dict[col].columns) - 1))
+                pdw_pre_insert = self.pdw_df_dict[col].set_index(
+                    len_cols).groupby(level=0).apply(
+                        lambda x: x.xs(x.name)[col].to_dict()).to_dict()
+
+                # Prepare underlier list
+                if ('underlierList',
+                        nan) in pdw_pre_insert['productGeneral'].keys() and (
+                            'underlierList', 'underlierWeight'
+                        ) in pdw_pre_insert['productGeneral'].keys():
+                    pdw_pre_insert['productGeneral']['underlierList'] = []
+                    for sym, weight in zip(
+                            pdw_pre_insert['productGeneral'][('underlierList',
+                                                              nan)],
+                            pdw_pre_insert['productGeneral'][(
+                                'underlierList', 'underlierWeight')]):
+                        pdw_pre_insert['productGeneral'][
+                            'underlierList'].append({
+                                'underlierSymbol':
+                                sym,
+                                'underlierWeight':
+                                weight,
+                                'underlierSource':
+                                'Bloomberg'
+                            })
+                    del pdw_pre_insert['productGeneral'][('underlierList',
+                                                          nan)]
+                    del pdw_pre_insert['productGeneral'][('underlierList',
+                                                          'underlierWeight')]
+
+                # Prepare final JSON
+                pdw_insert = {}
+                for key, val in pdw_pre_insert.items():
+                    pdw_insert[key] = {}
+                    for key2, val2 in val.items():
+                        if isinstance(key2, tuple):
+                            if isinstance(key2[1], str):
+                                pdw_insert[key][key2[0]] = {key2[1]: val2}
+                            else:
+                                pdw_insert[key][key2[0]] = val2
+                        else:
+                            pdw_insert[key][key2] = val2
+
+                # Final JSON assertions
+                required_fields = [
+                    'productProtection',
+                    'productCall',
+                    'productYield',
+                    'productGrowth',
+                ]
+                for field in required_fields:
+                    if field not in pdw_insert.keys():
+                        pdw_insert[field] = {}
+                if 'wrapperType' not in pdw_insert['productGeneral'].keys():
+                    pdw_insert['productGeneral']['wrapperType'] = 'Note'
+
+                # Export JSONS
+                self.result[col] = pdw_insert
+                self.result[col] = json.dumps(self.result[col])
+            except Exception as e:
+                template = ("An exception of type {0} occurred. "
+                            "Arguments:\n{1!r}")
+                message = template.format(type(e).__name__, e.args)
+                self.errors_dict[(col, 'insert_pdw_json_to_pdw')] = message
+
+    def output_jsons(self):
+        # The writing process as one method
+        self.reset_pdw_indices()
+        self.process_pdw_dicts()
+        self.gen_pdw_json()
+
+
+def issuer_scrapers():
+    """{issuer: IssuerScraper subclass} of every rule pack."""
+    from BmoScraper import BmoScraper
+    from label_table_scrapers import DesjardinsScraper, NbcssScraper, NoscoScraper, RbcScraper
+
+    return {scraper.issuer: scraper
+            for scraper in (BmoScraper, NbcssScraper, RbcScraper, DesjardinsScraper, NoscoScraper)}
+
+
+def issuer_for_url(url, scrapers=None):
+    from urllib.parse import urlsplit
+
+    host = urlsplit(url).netloc.lower()
+    for issuer, scraper in (scrapers or issuer_scrapers()).items():
+        if host in scraper.hosts:
+            return issuer
+    raise ValueError(f'No scraper for {url}')
+
+
+def group_urls_by_issuer(urls, scrapers=None):
+    scrapers = scrapers or issuer_scrapers()
+    urls_by_issuer = {}
+    for url in urls:
+        urls_by_issuer.setdefault(issuer_for_url(url, scrapers), []).append(url)
+    return urls_by_issuer
+
+
+def failed_urls(urls_by_issuer, errors):
+    """Urls that produced nothing because their page (or their whole issuer)
+    failed or their rule pack isn't verified for posting yet, as opposed to
+    ones that parsed badly; worth trying again."""
+    failed = set()
+    for issuer, issuer_errors in errors.items():
+        if (issuer, 'scrape_issuers') in issuer_errors or (issuer, 'post_payloads') in issuer_errors:
+            failed.update(canonical_url(url) for url in urls_by_issuer[issuer])
+        failed.update(key[0] for key in issuer_errors
+                      if isinstance(key, tuple) and key[1] == '__init__')
+    return failed
+
+
+def scrape_issuers(urls_by_issuer, scrapers=None, deduper=None, fetchers=None, price_store=None):
+    """Scrape every issuer's notes at the same time.
+
+    Each issuer's pack runs in its own thread with its own fetcher (from
+    fetchers, {issuer: NoteFetcher}, which the caller closes, or a new one
+    for this call), so one slow site doesn't
+    hold up the others.  Notes the deduper (the run's NoteDeduper) finds
+    under another url are dropped before their payload is built.  Packs
+    without post_payloads aren't fetched at all, and their urls come back
+    in failed_urls so they are scraped once the pack is verified.  With a PriceStore, the notes'
+    mark-to-market prices are appended to it.  Returns ({key: payload JSON},
+    {issuer: errors_dict}).
+    """
+    scrapers = scrapers or issuer_scrapers()
+    deduper = deduper or NoteDeduper()
+    fetchers = fetchers or {}
+
+    def scrape(issuer, urls):
+        scraper = scrapers[issuer](urls, fetchers.get(issuer))
+        scraper.run_all_rules()
+        scraper.drop_duplicate_notes(deduper)
+        scraper.output_jsons()
+        if price_store is not None:
+            # Prices are a side record; failing to save them never costs payloads
+            try:
+                price_store.append(scraper.mark_to_market_prices())
+            except Exception as e:
+                print(f'{issuer}: could not save mark-to-market prices: {e!r}')
+                scraper.errors_dict[(issuer, 'mark_to_market_prices')] = repr(e)
+        return scraper
+
+    results = {}
+    errors = {}
+    held_back = [issuer for issuer, urls in urls_by_issuer.items()
+                 if len(urls) and not scrapers[issuer].post_payloads]
+    for issuer in held_back:
+        print(f'{issuer}: {len(urls_by_issuer[issuer])} notes not scraped, '
+              'the rule pack is not verified for posting')
+        errors[issuer] = {(issuer, 'post_payloads'): 'rule pack not verified for posting'}
+    with ThreadPoolExecutor(max_workers=max(len(urls_by_issuer), 1)) as executor:
+        futures = {executor.submit(scrape, issuer, list(urls)): issuer
+                   for issuer, urls in urls_by_issuer.items()
+                   if len(urls) and issuer not in held_back}
+        for future in as_completed(futures):
+            issuer = futures[future]
+            try:
+                scraper = future.result()
+            except Exception as e:
+                errors[issuer] = {(issuer, 'scrape_issuers'): repr(e)}
+                continue
+            errors[issuer] = scraper.errors_dict
+            results.update(scraper.result)
+    return results, errors
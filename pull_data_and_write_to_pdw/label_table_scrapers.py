@@ -0,0 +1,165 @@
+import pandas as pd
+
+from field_catalog import FIELD_TYPES
+from issuer_scraper import IssuerScraper
+from listing_normalization import pdw_cusips_from_fundserv
+
+
+# Labels (lower case, without a trailing colon) that name each PDW field on
+# issuer note pages; the issuers' own listing column headings plus the
+# usual variants
+COMMON_LABELS = {
+    'productGeneral.productName': ['product name', 'name', 'note name'],
+    'productGeneral.fundservID': ['fundserv', 'fundserv code', 'fund code'],
+    'productGeneral.cusip': ['cusip'],
+    'productGeneral.isin': ['isin'],
+    'productGeneral.currency': ['currency'],
+    'productGeneral.issueDate': ['issue date'],
+    'productGeneral.maturityDate': ['maturity date'],
+    'productGeneral.tradeDate': ['trade date', 'pricing date'],
+}
+
+
+class LabelTableScraper(IssuerScraper):
+    """Rule pack for note pages that list their terms as label/value pairs.
+
+    Reads every two-column table (and single-row table with a header) as
+    labels and values, then maps labels to PDW fields with FIELD_LABELS.
+    Only the general fields are covered; an issuer's pack adds rules for the
+    call, yield and protection terms of its notes.  The packs haven't been
+    checked against real note pages yet, so their notes aren't scraped
+    or posted (see IssuerScraper.post_payloads).
+    """
+
+    issuer_name = None
+    post_payloads = False
+    FIELD_LABELS = COMMON_LABELS
+    PREPARE_STEPS = [
+        'collect_labels',
+        'set_pdw_index',
+    ]
+    RULES = [
+        '_PDW_Name',
+        '_labelled_fields',
+        '_issuer',
+        '_cusip',
+    ]
+
+    def note_key(self, url):
+        # Detail pages are often one script with an id in the query string
+        return url
+
+    def collect_labels(self):
+        self.labels = {}
+        for key, tables in self.notes_dict.items():
+            labels = {}
+            try:
+                for table in tables:
+                    if table.shape[1] == 2:
+                        pairs = table.itertuples(index=False, name=None)
+                    elif len(table) == 1:
+                        pairs = zip(table.columns, table.iloc[0])
+                    else:
+                        continue
+                    for label, value in pairs:
+                        if isinstance(label, str) and not pd.isna(value):
+                            labels.setdefault(label.strip().rstrip(':').strip().lower(), str(value).strip())
+            except Exception as e:
+                template = ("An exception of type {0} occurred. "
+                            "Arguments:\n{1!r}")
+                message = template.format(type(e).__name__, e.args)
+                self.errors_dict[(key, 'collect_labels')] = message
+            self.labels[key] = labels
+
+    # Set PDW index
+    def set_pdw_index(self):
+        try:
+            self.pdw_df.set_index('PDW Fields', inplace=True)
+        except Exception as e:
+            template = ("An exception of type {0} occurred. "
+                        "Arguments:\n{1!r}")
+            message = template.format(type(e).__name__, e.args)
+            self.errors_dict['set_pdw_index'] = message
+
+    # Rule: PDW Name
+    def _PDW_Name(self):
+        for key in self.notes_dict.keys():
+            try:
+                self.pdw_df[key] = None
+                self.pdw_df.at['PDW Name', key] = key
+            except Exception as e:
+                template = ("An exception of type {0} occurred. "
+                            "Arguments:\n{1!r}")
+                message = template.format(type(e).__name__, e.args)
+                self.errors_dict[(key, '_PDW_Name')] = message
+
+    # Rule: every field named by a label
+    def _labelled_fields(self):
+        for key, labels in self.labels.items():
+            for field, names in self.FIELD_LABELS.items():
+                value = next((labels[name] for name in names if name in labels), None)
+                if value is None:
+                    continue
+                try:
+                    if FIELD_TYPES.get(field) == 'date':
+                        value = pd.to_datetime(value).strftime(r'%Y-%m-%d')
+                    self.pdw_df.at[field, key] = value
+                except Exception as e:
+                    template = ("An exception of type {0} occurred. "
+                                "Arguments:\n{1!r}")
+                    message = template.format(type(e).__name__, e.args)
+                    self.errors_dict[(key, '_labelled_fields')] = (message, field, value)
+
+    # Rule: issuer
+    def _issuer(self):
+        for key in self.notes_dict.keys():
+            try:
+                self.pdw_df.at['productGeneral.issuer', key] = self.issuer_name
+            except Exception as e:
+                template = ("An exception of type {0} occurred. "
+                            "Arguments:\n{1!r}")
+                message = template.format(type(e).__name__, e.args)
+                self.errors_dict[(key, '_issuer')] = message
+
+    # Rule: cusip
+    def _cusip(self):
+        # FundSERV-only notes are filed in pdw under a cusip built from the code
+        try:
+            keys = list(self.notes_dict.keys())
+            fundserv_codes = self.pdw_df.loc['productGeneral.fundservID', keys]
+            missing = self.pdw_df.loc['productGeneral.cusip', keys].isna() & fundserv_codes.notna()
+            if missing.any():
+                self.pdw_df.loc['productGeneral.cusip', list(missing[missing].index)] = \
+                    pdw_cusips_from_fundserv(fundserv_codes[missing]).values
+        except Exception as e:
+            template = ("An exception of type {0} occurred. "
+                        "Arguments:\n{1!r}")
+            message = template.format(type(e).__name__, e.args)
+            self.errors_dict['_cusip'] = message
+
+
+class NbcssScraper(LabelTableScraper):
+    issuer = 'nbcss'
+    issuer_name = 'National Bank of Canada'
+    hosts = ('www.nbcstructuredsolutions.ca', 'nbcstructuredsolutions.ca')
+
+
+class RbcScraper(LabelTableScraper):
+    issuer = 'rbc'
+    issuer_name = 'Royal Bank of Canada'
+    hosts = ('www.rbcnotes.com', 'rbcnotes.com')
+    FIELD_LABELS = dict(COMMON_LABELS, **{
+        'productGeneral.fundservID': ['fundserv code', 'fundserv'],
+    })
+
+
+class DesjardinsScraper(LabelTableScraper):
+    issuer = 'desjardins'
+    issuer_name = 'Fédération des caisses Desjardins du Québec'
+    hosts = ('www.fondsdesjardins.com', 'fondsdesjardins.com')
+
+
+class NoscoScraper(LabelTableScraper):
+    issuer = 'nosco'
+    issuer_name = 'The Bank of Nova Scotia'
+    hosts = ('www.investorsolutions.gbm.scotiabank.com', 'investorsolutions.gbm.scotiabank.com')
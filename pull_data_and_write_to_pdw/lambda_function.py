@@ -1,65 +1,123 @@
-import json
-from oauth_access_token import get_new_token
-from call_product_api import call_luma_product_api
-from new_product_identifier import Driver 
-from BmoScraper import BmoScraper
+import os
+# Heavy modules (pandas, selenium, pymongo, the scraper) are imported inside
+# the stage that needs them, so importing this module does no work and the
+# post and drain modes never load them.
 
 
 client_credentials = {
-    'client_id':'CHANGEME',
-    'client_secret':'CHANGEME'
+    'client_id': os.environ.get('PDW_CLIENT_ID', 'CHANGEME'),
+    'client_secret': os.environ.get('PDW_CLIENT_SECRET', 'CHANGEME'),
 }
 
-def run_bmo_scraper(note_urls):
-    bmo = BmoScraper(note_urls)
-    bmo.run_all_rules()
-    bmo.output_jsons()
-
-    return bmo.result
-
-def run_url_crawler():
+def get_poster():
+    from pdw_poster import PdwPoster
+    from posting_ledger import PostingLedger
+    from retry_queue import RetryQueue
+    from token_manager import get_token_manager
+
+    # Reuses the cached token while it is valid
+    token_manager = get_token_manager(client_credentials['client_id'], client_credentials['client_secret'])
+    return PdwPoster(token_manager, ledger=PostingLedger(), retry_queue=RetryQueue())
+
+def close_poster(poster):
+    poster.close()
+    poster.ledger.close()
+    poster.retry_queue.close()
+
+def run_pipeline(poster, resume=True, context=None, incremental=False,
+                 pdw_lookup='auto', capture_prices=False):
+    from checkpoint import PipelineCheckpoint
+    from deadline import Deadline
+    from listing_snapshot import ListingSnapshot
+    from new_product_identifier import Driver
+    from note_urls import NoteAliases, NoteDeduper
+    from pipeline import Pipeline
+    from price_store import PriceStore
+
+    checkpoint = PipelineCheckpoint()
+    if not resume:
+        checkpoint.clear()
     driver = Driver()
-
-    # Get cusip and isin for all products added to pdw in the past week
-    recent_pdw_products_dict = driver.get_recent_pdw_products()
-
-    # Get new BMO products
-    bmo_prods = driver.get_bmo_products()
-    urls = driver.compare_site_to_pdw('bmo', bmo_prods, recent_pdw_products_dict)
-
-    return urls
+    # Only pages with new or changed rows are crawled; the rows of notes that
+    # fail to scrape or post are left for the next crawl
+    snapshot = ListingSnapshot(deferred=True) if incremental else None
+    # Remembers JHN codes seen to be aliases of a cusip across runs
+    aliases = NoteAliases()
+    try:
+        # Crawl, scrape and post as overlapping stages
+        # Stops cleanly before the invocation's timeout
+        return Pipeline(driver, poster, checkpoint=checkpoint,
+                        deadline=Deadline(context=context),
+                        listing_snapshot=snapshot,
+                        pdw_lookup=pdw_lookup,
+                        note_deduper=NoteDeduper(aliases),
+                        price_store=PriceStore() if capture_prices else None).run()
+    finally:
+        driver.close_driver()
+        aliases.close()
+        if snapshot is not None:
+            snapshot.close()
+
+def run_post(poster, products):
+    from pdw_schema import print_validation_report, validate_pdw_batch
+
+    # Validate the whole batch locally so bad payloads never hit the API
+    products, validation_errors = validate_pdw_batch(products)
+    print_validation_report(validation_errors)
+    results = poster.post_products(products)
+    return {
+        'success': [r['key'] for r in results if r['success']],
+        'error': sorted({key for keys in validation_errors.values() for key in keys})
+                 + [r['key'] for r in results if not r['success']],
+    }
+
+def run_drain(poster, ignore_backoff=False):
+    from retry_queue import drain
+
+    results = drain(poster.retry_queue, poster, ignore_backoff=ignore_backoff)
+    return {
+        'success': [r['key'] for r in results if r['success']],
+        'error': [r['key'] for r in results if not r['success']],
+    }
 
 # %% Write to PDW & view status
 
-def lambda_handler():
-    # Get urls with crawler
-    urls = run_url_crawler()
-    # Get product info with scraper 
-    products = run_bmo_scraper(urls)
-    # Generates new token
-    new_access_token = get_new_token(client_credentials['client_id'], client_credentials['client_secret'])
-    product_list_success = []
-    product_list_error = []
-    # Post to api
-    for key in products:
-        product_data = json.loads(products[key])
-        is_post_call_successful = call_luma_product_api(product_data, new_access_token)
-        if is_post_call_successful:
-            product_list_success.append(key)
+def lambda_handler(event=None, context=None):
+    """Run the pipeline, or only post or drain when the event asks for it.
+
+    event['mode'] is 'pipeline' (default; set event['resume'] to False to
+    discard an unfinished run's checkpoint, and event['incremental'] to stop
+    paginating listings at already-crawled rows; event['pdw_lookup'] is
+    'auto', 'index' or 'query', see Driver.get_pdw_lookup; event['capture_prices']
+    saves the notes' bid prices to the PriceStore at PDW_PRICE_STORE), 'post' with
+    event['products'] as {key: product}, or 'drain' to re-send the retry
+    queue (set event['ignore_backoff'] to send everything queued).
+    """
+    event = event or {}
+    mode = event.get('mode', 'pipeline')
+    poster = get_poster()
+    try:
+        if mode == 'pipeline':
+            summary = run_pipeline(poster, event.get('resume', True), context,
+                                   event.get('incremental', False),
+                                   event.get('pdw_lookup', 'auto'),
+                                   event.get('capture_prices', False))
+        elif mode == 'post':
+            summary = run_post(poster, event['products'])
+        elif mode == 'drain':
+            summary = run_drain(poster, event.get('ignore_backoff', False))
         else:
-            product_list_error.append(key)
+            raise ValueError(f'Unknown mode {mode!r}')
+    finally:
+        close_poster(poster)
+    product_list_success = summary['success']
+    product_list_error = summary['error']
 
     print(f'{product_list_success} are succesfully posted.')
     print(f'{product_list_error} are posted with errors.')
 
+    return {'success': product_list_success, 'error': product_list_error}
 
 
-
-
-
-
-
-
-
-
-lambda_handler()
\ No newline at end of file
+if __name__ == '__main__':
+    lambda_handler()
@@ -0,0 +1,108 @@
+import re
+
+import requests
+
+
+BMO_LISTING_URLS = [
+    'https://www.bmonotes.com/Type/PPNs#active',
+    'https://www.bmonotes.com/Type/Fixed-Income-Notes#active',
+    'https://www.bmonotes.com/Type/NPPNs#active',
+]
+NBCSS_LISTING_URL = 'https://www.nbcstructuredsolutions.ca/listeProduits.aspx?mode=previous'
+NOSCO_LISTING_URL = 'https://www.investorsolutions.gbm.scotiabank.com/ppn-public/home.do'
+NBCSS_PAGES = 5
+DEFAULT_TIMEOUT = 30
+# Some issuer sites reject the default python-requests user agent
+USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/105.0 Safari/537.36')
+
+
+class ListingUnavailable(Exception):
+    """The plain-HTTP backend can't produce this listing; use Selenium."""
+
+
+def parse_listing(url, parse, html):
+    """parse(html), with a page that isn't the listing (a bot check, or one
+    only rendered by JavaScript) raised as ListingUnavailable."""
+    try:
+        return parse(html)
+    except (ValueError, IndexError, KeyError) as e:
+        raise ListingUnavailable(f'{url}: unexpected listing page ({e})') from e
+
+
+class HttpListingBackend:
+    """Fetch issuer listing pages with plain HTTP instead of a browser.
+
+    Each issuer's backend returns the same page HTML or tables the Selenium
+    path reads, so Driver parses both the same way.  Any failure raises
+    ListingUnavailable and Driver falls back to Selenium.
+    """
+
+    def __init__(self, session=None, timeout=DEFAULT_TIMEOUT):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+        self.timeout = timeout
+
+    def get(self, url, **kwargs):
+        try:
+            response = self.session.get(url.split('#')[0],
+                                        timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise ListingUnavailable(f'{url}: {e}') from e
+        return response.text
+
+    def post(self, url, data):
+        try:
+            response = self.session.post(url, data=data, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise ListingUnavailable(f'{url}: {e}') from e
+        return response.text
+
+
+class NbcssHttpBackend(HttpListingBackend):
+    """NBCSS listing, paginated with ASP.NET postbacks."""
+
+    postback = re.compile(r"__doPostBack\('([^']+)','([^']*)'\)")
+
+    def _next_page_form(self, html, num):
+        """Form data for the postback the Selenium path triggers by clicking
+        the num-th link of the pager."""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'lxml')
+        pager = soup.find(id='ctl00_cphMain_dpProductsHaut')
+        links = pager.find_all('a') if pager else []
+        match = (self.postback.search(links[num - 1].get('href', ''))
+                 if len(links) >= num else None)
+        if match is None:
+            raise ListingUnavailable(f'NBCSS pager link {num} not found')
+        data = {field['name']: field.get('value', '')
+                for field in soup.select('input[type=hidden][name]')}
+        data.update(__EVENTTARGET=match.group(1),
+                    __EVENTARGUMENT=match.group(2))
+        return data
+
+    def iter_pages(self, pages=NBCSS_PAGES):
+        """Yield the HTML of each listing page."""
+        html = self.get(NBCSS_LISTING_URL)
+        yield html
+        for num in range(2, pages + 1):
+            html = self.post(NBCSS_LISTING_URL,
+                             self._next_page_form(html, num))
+            yield html
+
+    def fetch_pages(self, parse, pages=NBCSS_PAGES):
+        """Every listing page, read with parse."""
+        return [parse_listing(NBCSS_LISTING_URL, parse, html) for html in self.iter_pages(pages)]
+
+
+class NoscoHttpBackend(HttpListingBackend):
+    """Scotia ppn-public home page, which is plain HTML."""
+
+    def fetch_html(self):
+        return self.get(NOSCO_LISTING_URL)
+
+    def fetch_listing(self, parse):
+        return parse_listing(NOSCO_LISTING_URL, parse, self.fetch_html())
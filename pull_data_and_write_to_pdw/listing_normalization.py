@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+
+# Placeholder rows DataTables shows while a page is loading
+JUNK_CODES = ['Loading...', 'No data available in table']
+# Listing columns with few distinct values, stored as categories
+CATEGORY_COLUMNS = ['Currency']
+
+
+def pdw_cusips_from_jhn(codes):
+    '''Convert JHN codes / cusips to the cusips used in pdw'''
+    codes = codes.astype(str)
+    length = codes.str.len()
+    jhn = codes.str.contains('JHN', regex=False)
+    # Pick each row's prefix first so the strings are only built once
+    prefix = np.select(
+        [jhn & (length == 7), jhn & (length == 8), jhn & (length == 6), ~jhn & (length == 9)],
+        ['CA', 'C', 'CAD', ''],
+        'Error')
+    return (prefix + codes).where(prefix != 'Error', 'Error')
+
+
+def pdw_cusips_from_fundserv(codes):
+    '''Cusips pdw files FundSERV-only notes under'''
+    codes = codes.astype(str)
+    return ('C' + codes).where(codes.str.len() != 7, 'CA' + codes)
+
+
+CUSIP_RULES = {
+    'jhn': pdw_cusips_from_jhn,
+    'fundserv': pdw_cusips_from_fundserv,
+}
+
+
+def normalize_listing(pages, code_column, cusip_rule, columns=None, url_prefix=None):
+    '''Combine a listing's page fragments into one typed table
+
+    Concatenates the pages once, drops placeholder rows, optionally keeps
+    only `columns` and prefixes relative urls, then adds pdwCusip from
+    code_column with one of CUSIP_RULES.  Every step is a column operation,
+    so the cost stays flat per row even for full-history listings.
+    '''
+    pages = [page for page in pages if page is not None]
+    listing = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0].reset_index(drop=True)
+    codes = listing[code_column]
+    listing = listing[codes.notna() & ~codes.isin(JUNK_CODES)]
+    if columns is not None:
+        listing = listing[columns]
+    listing = listing.copy()
+    listing[code_column] = listing[code_column].astype(str).str.strip()
+    if url_prefix is not None:
+        listing['urls'] = url_prefix + listing['urls'].astype(str)
+    for column in CATEGORY_COLUMNS:
+        if column in listing.columns:
+            listing[column] = listing[column].astype('category')
+    listing['pdwCusip'] = CUSIP_RULES[cusip_rule](listing[code_column])
+
+    return listing
@@ -0,0 +1,100 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from sqlite_batches import select_in
+
+
+DEFAULT_SNAPSHOT_PATH = os.environ.get('PDW_LISTING_SNAPSHOT', '/tmp/pdw_listing_snapshot.sqlite')
+
+
+def row_hash(row):
+    """Stable hash of a listing row (a dict), with NaN treated as empty."""
+    values = {str(k): (None if v != v else str(v)) for k, v in row.items()}
+    return hashlib.sha256(
+        json.dumps(values, sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+
+
+class ListingSnapshot:
+    """The listing rows each issuer showed on previous crawls.
+
+    Rows are keyed by issuer and pdw cusip, with a hash of the whole row so a
+    crawl can tell new and changed rows from ones it has already seen.
+
+    With deferred, observed rows are only held until record() is called for
+    their codes, so a note that fails to scrape or post is offered again by
+    the next incremental crawl.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, deferred=False):
+        self.path = path
+        self.deferred = deferred
+        self._staged = {}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listing_rows (
+                issuer TEXT NOT NULL,
+                code TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (issuer, code)
+            )
+        ''')
+        self.conn.commit()
+
+    def known_hashes(self, issuer, codes):
+        """Return {code: row_hash} of the codes already in the snapshot."""
+        with self._lock:
+            return dict(select_in(
+                self.conn,
+                'SELECT code, row_hash FROM listing_rows '
+                'WHERE issuer = ? AND code IN ({})', codes, [issuer]))
+
+    def observe(self, issuer, page, code_column='pdwCusip'):
+        """Record (or stage) a listing page; return its new or changed rows.
+
+        Also returns whether every code on the page was already known, which
+        is when an incremental crawl stops paginating.
+        """
+        codes = [str(code) for code in page[code_column]]
+        hashes = [row_hash(row) for row in page.to_dict('records')]
+        known = self.known_hashes(issuer, codes)
+        changed = [known.get(code) != h for code, h in zip(codes, hashes)]
+        all_known = all(code in known for code in codes)
+
+        rows = {(issuer, code): h for code, h in zip(codes, hashes)}
+        if self.deferred:
+            # Unchanged rows need no handling; only refresh when they were seen
+            with self._lock:
+                self._staged.update((key, h) for key, h, c in zip(rows, hashes, changed) if c)
+            rows = {key: h for key, h, c in zip(rows, hashes, changed) if not c}
+        self._write(rows)
+
+        return page.loc[changed], all_known
+
+    def _write(self, rows):
+        now = datetime.datetime.utcnow().isoformat()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO listing_rows VALUES (?, ?, ?, '
+                'COALESCE((SELECT first_seen FROM listing_rows '
+                'WHERE issuer = ? AND code = ?), ?), ?)',
+                [(issuer, code, h, issuer, code, now, now)
+                 for (issuer, code), h in rows.items()])
+
+    def record(self, issuer, codes):
+        """Write the deferred rows of codes, once their notes are handled."""
+        with self._lock:
+            rows = {(issuer, str(code)): self._staged.pop((issuer, str(code)))
+                    for code in codes if (issuer, str(code)) in self._staged}
+        if rows:
+            self._write(rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,95 @@
+import argparse
+import copy
+import json
+import os
+import time
+
+from pdw_poster import PdwPoster
+from pdw_stub_server import (AUTH_PATH, PRODUCTS_PATH, StubConfig,
+                             start_stub_server)
+from token_manager import TokenManager
+
+
+def make_products(count):
+    """Copies of product.json with distinct ISINs."""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'product.json')) as f:
+        template = json.load(f)
+    products = {}
+    for i in range(count):
+        product = copy.deepcopy(template)
+        product['productGeneral']['isin'] = f'LOADTEST{i:05d}'
+        products[f'LOADTEST{i:05d}'] = product
+    return products
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_load_test(base_url, products, concurrency_levels):
+    """Post the products at each concurrency level and report the results."""
+    report = []
+    for concurrency in concurrency_levels:
+        token_manager = TokenManager('load-test', 'load-test', cache_path=None,
+                                     auth_server_url=base_url + AUTH_PATH)
+        with PdwPoster(token_manager, max_workers=concurrency,
+                       url=base_url + PRODUCTS_PATH, verbose=False) as poster:
+            start = time.perf_counter()
+            results = poster.post_products(products)
+            wall = time.perf_counter() - start
+        latencies = [r['elapsed'] for r in results]
+        statuses = {}
+        for r in results:
+            statuses[r['status_code']] = statuses.get(r['status_code'], 0) + 1
+        report.append({
+            'concurrency': concurrency,
+            'requests': len(results),
+            'wall_seconds': wall,
+            'throughput': len(results) / wall if wall else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'statuses': statuses,
+        })
+    return report
+
+
+def print_report(report):
+    print(f'{"workers":>8} {"reqs":>6} {"wall s":>8} {"req/s":>8} '
+          f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}  statuses')
+    for row in report:
+        print(f'{row["concurrency"]:>8} {row["requests"]:>6} '
+              f'{row["wall_seconds"]:>8.2f} {row["throughput"]:>8.1f} '
+              f'{row["p50"] * 1000:>8.1f} {row["p95"] * 1000:>8.1f} '
+              f'{row["p99"] * 1000:>8.1f}  {row["statuses"]}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Drive the PDW poster against the local stub server')
+    parser.add_argument('--products', type=int, default=300)
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--base-url',
+                        help='Use an already running stub instead of starting one')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_stub_server(StubConfig(
+            args.latency, args.jitter, args.error_rate, args.throttle_rate,
+            seed=0))
+    report = run_load_test(base_url, make_products(args.products),
+                           [int(c) for c in args.concurrency.split(',')])
+    print_report(report)
+    if server is not None:
+        server.shutdown()
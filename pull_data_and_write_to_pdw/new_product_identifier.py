@@ -1,256 +1,326 @@
-import keyring
 import pandas as pd
 import datetime
-import time
-from selenium import webdriver
-from pymongo import MongoClient
-from bs4 import BeautifulSoup
+from io import StringIO
+from urllib.parse import urljoin
+from listing_backends import (BMO_LISTING_URLS, NBCSS_LISTING_URL, NOSCO_LISTING_URL,
+                              ListingUnavailable, NbcssHttpBackend, NoscoHttpBackend)
+from browser_pool import DEFAULT_PROFILE, new_chrome
+from dom_extract import extract_table
+from listing_normalization import normalize_listing
+from note_urls import NoteDeduper, bmo_note_url
+from pdw_existence_query import PdwExistenceQuery
+from pdw_identifier_index import PdwIdentifierIndex, index_is_durable
+from page_readiness import (SITE_READINESS, datatables_idle, datatables_show_all, document_ready,
+                            rows_changed, rows_present, table_signature)
+# selenium, pymongo, keyring and bs4 are imported where they are used so that
+# importing this module for its helpers stays cheap
+
+
+def clean_bmo_listing(bmo_products):
+    '''Drop junk rows from a BMO listing page and add the pdw cusip'''
+    # Remove junk and create pdw cusip for comparison
+    return normalize_listing([bmo_products], 'JHN Code / Cusip', 'jhn')
+
+
+def parse_nbcss_page(html):
+    '''Read one NBCSS listing page and its product links'''
+    from bs4 import BeautifulSoup
+
+    nbcss_page = pd.read_html(StringIO(html))[0]
+    links = BeautifulSoup(html, 'lxml').select('a[id^="ctl00_cphMain_lvProducts_ctrl"][id$="_lnkProduit"]')
+    nbcss_page['urls'] = [urljoin(NBCSS_LISTING_URL, link.get('href')) for link in links]
+
+    return nbcss_page
+
+
+def parse_nosco_listing(html):
+    '''Read the Scotia PPN and at-risk tables and their product links'''
+    from bs4 import BeautifulSoup
+
+    tables = pd.read_html(StringIO(html))
+    nosco_ppn = tables[0]
+    nosco_at_risk = tables[1]
+    html_tables = BeautifulSoup(html, 'lxml').find_all('table')
+    nosco_ppn['urls'] = [link.get('href') for link in html_tables[0].find_all('a')]
+    nosco_at_risk['urls'] = [link.get('href') for link in html_tables[1].find_all('a')]
+    return normalize_listing([nosco_ppn, nosco_at_risk], 'Fund Code', 'jhn',
+                             url_prefix='https://www.investorsolutions.gbm.scotiabank.com/ppn-public/')
 
 
 class Driver:
 
-    def __init__(self):
-        # Setup driver
-        chrome_path = r"/opt/homebrew/bin/chromedriver"
-        op = webdriver.ChromeOptions()
-        op.add_argument('--headless')
-        self.driver = webdriver.Chrome(chrome_path, options=op)
+    def __init__(self, http_first=True, readiness=None, browser_pool=None,
+                 browser_profile=DEFAULT_PROFILE):
+        # Listings are fetched with plain HTTP where possible; Chrome is only
+        # started (or leased from browser_pool) the first time a listing needs it
+        self.http_first = http_first
+        self.browser_pool = browser_pool
+        # The crawler profile skips images, fonts, css and trackers
+        self.browser_profile = browser_profile
+        self._browsers = {}
+        # Per-site PageReadiness overrides, e.g. {'rbc': PageReadiness(timeout=60)}
+        self.readiness = dict(SITE_READINESS, **(readiness or {}))
+
+    def _browser(self, profile):
+        if profile not in self._browsers:
+            if self.browser_pool is not None:
+                self._browsers[profile] = self.browser_pool.acquire(profile)
+            else:
+                self._browsers[profile] = new_chrome(profile)
+        return self._browsers[profile]
+
+    @property
+    def driver(self):
+        return self._browser(self.browser_profile)
 
     def get_recent_pdw_products(self):
         ''''''
+        from pdw_mongo import pdw_products_collection, stream
+
         # Define dates
         today = datetime.datetime.today()
         one_week_ago = today - datetime.timedelta(weeks=1)
 
-        # Create connection string for DocDB
-        user = "dbadmin"
-        password = keyring.get_password('docdb_prod_dbadmin', 'dbadmin')
-        host = "dev-documentdb.cluster-cb6kajicuplh.us-east-1.docdb.amazonaws.com"
-        port = "27017"
-        options = "tls=true&tlsAllowInvalidCertificates=true&replicaSet=rs0&readPreference=secondaryPreferred&retryWrites=false"
-        cxn_string_template= "mongodb://{}:{}@{}:{}/?{}"
-        cxn_string_prod = cxn_string_template.format(user, password, host, port, options)
-
         # Get past week's new products
-        client = MongoClient(cxn_string_prod)
-        db = client['product-uat']
-        results_ = list(db.PdwProductCore.find(
-            {'createTimestamp': {'$gte': one_week_ago}}, 
-            ('productGeneral.cusip', 'productGeneral.isin')
-        ))
-        id_dict = {}
-        id_dict['cusip'] = [i['productGeneral']['cusip'] for i in results_ if 'cusip' in i['productGeneral']]
-        id_dict['isin'] = [i['productGeneral']['isin'] for i in results_ if 'isin' in i['productGeneral']]
+        id_dict = {'cusip': [], 'isin': []}
+        for i in stream(pdw_products_collection(), {'createTimestamp': {'$gte': one_week_ago}},
+                        ('productGeneral.cusip', 'productGeneral.isin')):
+            for field in ('cusip', 'isin'):
+                if field in i.get('productGeneral', {}):
+                    id_dict[field].append(i['productGeneral'][field])
 
         return id_dict
+
+    def get_pdw_identifier_index(self):
+        '''Local index of every PDW identifier, synced with products created since the last run'''
+        index = PdwIdentifierIndex()
+        print(f'Indexed {index.sync()} new PDW products')
+
+        return index
+
+    def get_pdw_lookup(self, mode='auto'):
+        '''What compare_site_to_pdw checks listings against
+
+        'index' syncs the local identifier index; 'query' asks PDW about each
+        listing's codes with batched $in queries and keeps nothing locally.
+        'auto' uses the index when it survives between runs (see
+        index_is_durable), so a cold start doesn't scan all of PDW to
+        rebuild it, and queries otherwise.
+        '''
+        if mode == 'auto':
+            mode = 'index' if index_is_durable() else 'query'
+        if mode == 'index':
+            return self.get_pdw_identifier_index()
+        elif mode == 'query':
+            return PdwExistenceQuery()
+        raise ValueError(f'Unknown pdw lookup mode {mode!r}')
     
 
-    def get_bmo_products(self):
-        ''''''
-        # Setup for bmo
-        bmo_act_dict = {}
-        urls = [
-            'https://www.bmonotes.com/Type/PPNs#active', 
-            'https://www.bmonotes.com/Type/Fixed-Income-Notes#active', 
-            'https://www.bmonotes.com/Type/NPPNs#active'
-        ]
-        all_bmo_active_products = pd.DataFrame()
-        driver = self.driver
+    def iter_bmo_product_pages(self, urls=BMO_LISTING_URLS, snapshot=None):
+        '''Yield each cleaned BMO listing page as soon as it is read
+
+        The DataTables page length is set to all rows, so a listing is
+        usually one page; the pager is only followed if that didn't take.
+        With a ListingSnapshot the crawl is incremental: only rows that are new
+        or changed since the last crawl are yielded, and since new notes are
+        listed first, a listing stops paginating at the first page whose codes
+        are all already known.
+        '''
         for url in urls:
             print(url)
+            # The table is filled in by ajax, so it always needs the browser
+            driver = self.driver
+            ready = self.readiness['bmo']
+            table = '#DataTables_Table_1'
             # Get first page
             page = driver.get(url)
-            time.sleep(2)
-            bmo_act_dict[0] = pd.read_html(driver.page_source)[1]
-            # Get remaining pages
+            ready.wait(driver, document_ready, rows_present(table), datatables_idle('DataTables_Table_1'),
+                       description=url)
+            # Then every row at once rather than paging through them
+            previous = table_signature(driver, table)
+            if datatables_show_all(driver, 'DataTables_Table_1'):
+                ready.wait(driver, rows_changed(previous, table), datatables_idle('DataTables_Table_1'),
+                           description=f'{url} all rows')
+            page = clean_bmo_listing(extract_table(driver, table))
             flag = True
-            num = 1
+            if snapshot is not None:
+                page, all_known = snapshot.observe('bmo', page)
+                flag = not all_known
+            yield page
+            # Get remaining pages
             while flag:
                 if 'disabled' in driver.find_element_by_id("DataTables_Table_1_next").get_attribute('class'):
                     flag = 0
                 else:
+                    previous = table_signature(driver, table)
                     driver.execute_script("arguments[0].click();", driver.find_element_by_id("DataTables_Table_1_next"))
-                    time.sleep(2)
-                    bmo_act_dict[num] = pd.read_html(driver.page_source)[1]
-                    num += 1
-            # Combine the dataframes
-            bmo_active_products = pd.concat([bmo_act_dict[k] for k in bmo_act_dict.keys()], ignore_index=True)
-            all_bmo_active_products = pd.concat([all_bmo_active_products, bmo_active_products], ignore_index=True)
-        # Remove junk
-        all_bmo_active_products = all_bmo_active_products[(all_bmo_active_products['JHN Code / Cusip'].isna()==False) & (all_bmo_active_products['JHN Code / Cusip']!='Loading...')]
-        # Create pdw cusip for comparison
-        listy = []
-        for i in all_bmo_active_products['JHN Code / Cusip']:
-            if 'JHN' in str(i):
-                if len(str(i)) == 7:
-                    listy.append('CA' + str(i))
-                elif len(str(i)) == 8:
-                    listy.append('C' + str(i))
-                elif len(str(i)) == 6:
-                    listy.append('CAD' + str(i))
-                else:
-                    listy.append('Error')
-            else:
-                if len(str(i)) == 9:
-                    listy.append(str(i))
-                else:
-                    listy.append('Error')
-        all_bmo_active_products['pdwCusip'] = listy
+                    ready.wait(driver, rows_changed(previous, table), datatables_idle('DataTables_Table_1'),
+                               description=f'{url} next page')
+                    page = clean_bmo_listing(extract_table(driver, table))
+                    if snapshot is not None:
+                        page, all_known = snapshot.observe('bmo', page)
+                        flag = not all_known
+                    yield page
+
+    def get_bmo_products(self, urls=BMO_LISTING_URLS, snapshot=None):
+        ''''''
+        # Combine the pages of all three listings (only the delta with a snapshot)
+        all_bmo_active_products = pd.concat(list(self.iter_bmo_product_pages(urls, snapshot)), ignore_index=True)
 
         return all_bmo_active_products
     
     def get_nbcss_products(self):
+        nbcss_pages = None
+        if self.http_first:
+            try:
+                nbcss_pages = NbcssHttpBackend().fetch_pages(parse_nbcss_page)
+            except ListingUnavailable as e:
+                print(f'Falling back to Selenium: {e}')
+        if nbcss_pages is None:
+            nbcss_pages = self._get_nbcss_pages_selenium()
+        # Combine the pages and create pdw cusip for comparison
+        return normalize_listing(nbcss_pages, 'FundSERV', 'fundserv')
+
+    def _get_nbcss_pages_selenium(self):
         # Setup for nbc_ss
         nbcss_act_dict = {}
+        ready = self.readiness['nbcss']
         # Get first page
-        url = 'https://www.nbcstructuredsolutions.ca/listeProduits.aspx?mode=previous'
+        url = NBCSS_LISTING_URL
         self.driver.get(url)
-        time.sleep(2)
-        nbcss_act_dict[0] = pd.read_html(self.driver.page_source)[0]
-        nbcss_act_dict[0]['urls'] = [
-            self.driver.find_element_by_xpath('//*[@id="ctl00_cphMain_lvProducts_ctrl{}_lnkProduit"]'.format(i)).get_attribute('href') for i in range(len(nbcss_act_dict[0]))
-        ]
+        ready.wait(self.driver, document_ready, rows_present(), description=url)
+        product_link = 'a[id^="ctl00_cphMain_lvProducts_ctrl"][id$="_lnkProduit"]'
+        nbcss_act_dict[0] = extract_table(self.driver, link_selector=product_link)
         # Get remaining 4 pages
         for num in range(2, 6):
+            previous = table_signature(self.driver)
             self.driver.find_element_by_xpath('//*[@id="ctl00_cphMain_dpProductsHaut"]/a[{}]'.format(str(num))).click()
-            time.sleep(2)
-            nbcss_act_dict[num] = pd.read_html(self.driver.page_source)[0]
-            nbcss_act_dict[num]['urls'] = [
-                self.driver.find_element_by_xpath('//*[@id="ctl00_cphMain_lvProducts_ctrl{}_lnkProduit"]'.format(i)).get_attribute('href') for i in range(len(nbcss_act_dict[num]))
-            ]
-        # Combine the dataframes
-        nbcss_active_products = pd.concat([nbcss_act_dict[k] for k in nbcss_act_dict.keys()], ignore_index=True)
-        # Create pdw cusip for comparison
-        nbcss_active_products['pdwCusip'] = [
-            'CA' + i if len(i) == 7 else 'C' + i for i in nbcss_active_products['FundSERV']
-        ]
-
-        return nbcss_active_products
+            # The postback reloads the whole page
+            ready.wait(self.driver, document_ready, rows_changed(previous), description=f'NBCSS page {num}')
+            nbcss_act_dict[num] = extract_table(self.driver, link_selector=product_link)
+        return list(nbcss_act_dict.values())
     
     def get_rbc_products(self):
         # Setup for rbc
         rbc_act_dict = {}
         driver = self.driver
+        ready = self.readiness['rbc']
+        grid = '#productGrid > div:nth-child(2) > div:nth-child(3) > table'
+
+        def read_grid_page():
+            # The header is a separate table; product rows alternate with
+            # detail rows, which are empty or hold 'Day' counts in column 7
+            temp_data = extract_table(driver, grid, header_selector='#productGrid .k-grid-header th',
+                                      link_selector='td:nth-child(3) a')
+            column_7 = temp_data.iloc[:, 7]
+            return temp_data[(column_7.isna()==False) & (column_7.str.contains('Day')==False)]
+
         url = 'https://www.rbcnotes.com/Products'
         # Get first page
         driver.get(url)
-        time.sleep(2)
-        temp_table = pd.read_html(driver.page_source)
-        temp_data = temp_table[1][(temp_table[1][7].isna()==False) & (temp_table[1][7].str.contains('Day')==False)]
-        temp_data.columns = temp_table[0].columns
-        rbc_act_dict[0] = temp_data
-        rbc_act_dict[0]['urls'] = [driver.find_element_by_xpath('//*[@id="productGrid"]/div[2]/div[3]/table/tbody/tr[{}]/td[3]/a'.format(i)).get_attribute('href') 
-                                        for i in range(1, len(rbc_act_dict[0])*2, 2)]
+        ready.wait(driver, document_ready, rows_present(grid), description=url)
+        rbc_act_dict[0] = read_grid_page()
         # Get remaining 4 pages
         for num in range(2, 6):
             # Scroll to bottom of page to avoid cookie consent form
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            previous = table_signature(driver, grid)
             driver.find_element_by_xpath('//*[@id="productGrid"]/div[2]/div[4]/a[3]').click()
-            time.sleep(2)
-            temp_table = pd.read_html(driver.page_source)
-            temp_data = temp_table[1][(temp_table[1][7].isna()==False) & (temp_table[1][7].str.contains('Day')==False)]
-            temp_data.columns = temp_table[0].columns
-            rbc_act_dict[num] = temp_data
-            rbc_act_dict[num]['urls'] = [driver.find_element_by_xpath('//*[@id="productGrid"]/div[2]/div[3]/table/tbody/tr[{}]/td[3]/a'.format(i)).get_attribute('href') 
-                                        for i in range(1, len(rbc_act_dict[0])*2, 2)]
+            ready.wait(driver, rows_changed(previous, grid), description=f'RBC page {num}')
+            rbc_act_dict[num] = read_grid_page()
         # Combine the dataframes
-        rbc_active_products = pd.concat([rbc_act_dict[k] for k in rbc_act_dict.keys()], ignore_index=True)
-        rbc_active_products = rbc_active_products[['Product Name', 'FundSERV Code', 'ADP Code',
-            'CUSIP', 'End of Day Price', 'Current ETC', 'ETC End Date',
-            'Issue Date', 'Maturity Date', 'Currency', 'urls']]
-        # Create pdw cusip for comparison
-        rbc_active_products['pdwCusip'] = [
-            'CA' + i if len(i) == 7 else 'C' + i for i in rbc_active_products['FundSERV Code']
-        ]
-
-        return rbc_active_products
+        # Combine the pages and create pdw cusip for comparison
+        return normalize_listing(
+            list(rbc_act_dict.values()), 'FundSERV Code', 'fundserv',
+            columns=['Product Name', 'FundSERV Code', 'ADP Code',
+                     'CUSIP', 'End of Day Price', 'Current ETC', 'ETC End Date',
+                     'Issue Date', 'Maturity Date', 'Currency', 'urls'])
 
     def get_desjardins_products(self):
         ''''''
-        # Setup for Desjardins (need new non-headless driver)
-        chrome_path = r"/opt/homebrew/bin/chromedriver"
-        op = webdriver.ChromeOptions()
-        op.add_argument('--window-size=1920,1080')
-        op.add_experimental_option( "prefs",{'profile.managed_default_content_settings.javascript': 1})
-        driver = webdriver.Chrome(chrome_path, options=op)
+        from bs4 import BeautifulSoup
+
+        # Setup for Desjardins (need non-headless driver)
+        driver = self._browser('desktop')
+        ready = self.readiness['desjardins']
         url = 'https://www.fondsdesjardins.com/structurednotes/products/index.jsp'
+        splash_button = '//*[@id="splash-page"]/div/div/div[2]/div[2]/div[3]/button'
         # Get non-paginated PPN page
         driver.get(url)
-        time.sleep(2)
-        driver.execute_script("arguments[0].click();", driver.find_element_by_xpath('//*[@id="splash-page"]/div/div/div[2]/div[2]/div[3]/button'))
-        time.sleep(20)
+        ready.wait(driver, document_ready, lambda d: d.find_elements_by_xpath(splash_button), description=url)
+        driver.execute_script("arguments[0].click();", driver.find_element_by_xpath(splash_button))
+        ready.wait(driver, rows_present(), description='Desjardins PPN table')
         html_table = BeautifulSoup(driver.page_source).find('table')
         ppn_table = pd.read_html(driver.page_source)[0]
         ppn_table['urls'] = [link.get('href') for link in html_table.find_all('a') if '/pdf/' not in link.get('href')]
         driver.execute_script("arguments[0].click();", driver.find_element_by_link_text('Non-Principal Protected'))
-        time.sleep(2)
+        ready.wait(driver, rows_present(index=1), description='Desjardins NPPN table')
         nppn_table = pd.read_html(driver.page_source)[1]
         html_table = BeautifulSoup(driver.page_source).find_all('table')[1]
         nppn_table['urls'] = [link.get('href') for link in html_table.find_all('a') if '/pdf/' not in link.get('href')]
-        new_desjardins_products = pd.concat([ppn_table, nppn_table], ignore_index=True)
-        new_desjardins_products['urls'] = ['https://www.fondsdesjardins.com' + i for i in new_desjardins_products['urls']]
-        new_desjardins_products['pdwCusip'] = [
-            'CA' + i if len(i) == 7 else 'C' + i for i in new_desjardins_products['Code']
-        ]
 
-        return new_desjardins_products
+        return normalize_listing([ppn_table, nppn_table], 'Code', 'fundserv',
+                                 url_prefix='https://www.fondsdesjardins.com')
 
     def get_nosco_products(self):
         ''''''
-        # Setup for rbc
-        rbc_act_dict = {}
+        # The page is plain HTML, so the browser is only a fallback
+        if self.http_first:
+            try:
+                return NoscoHttpBackend().fetch_listing(parse_nosco_listing)
+            except ListingUnavailable as e:
+                print(f'Falling back to Selenium: {e}')
         driver = self.driver
-        url = 'https://www.investorsolutions.gbm.scotiabank.com/ppn-public/home.do'
-        driver.get(url)
-        time.sleep(2)
-        tables = pd.read_html(driver.page_source)
-        nosco_ppn = tables[0]
-        nosco_at_risk = tables[1]
-        html_tables = BeautifulSoup(driver.page_source).find_all('table')
-        nosco_ppn['urls'] = [link.get('href') for link in html_tables[0].find_all('a')]
-        nosco_at_risk['urls'] = [link.get('href') for link in html_tables[1].find_all('a')]
-        new_nosco_products = pd.concat([nosco_ppn, nosco_at_risk], ignore_index=False)
-        new_nosco_products['urls'] = [
-            'https://www.investorsolutions.gbm.scotiabank.com/ppn-public/' + i for i in new_nosco_products['urls']
-        ]
-        listy = []
-        for i in new_nosco_products['Fund Code']:
-            if 'JHN' in str(i):
-                if len(str(i)) == 7:
-                    listy.append('CA' + str(i))
-                elif len(str(i)) == 8:
-                    listy.append('C' + str(i))
-                elif len(str(i)) == 6:
-                    listy.append('CAD' + str(i))
-                else:
-                    listy.append('Error')
-            else:
-                if len(str(i)) == 9:
-                    listy.append(str(i))
-                else:
-                    listy.append('Error')
-        new_nosco_products['pdwCusip'] = listy
+        driver.get(NOSCO_LISTING_URL)
+        self.readiness['nosco'].wait(driver, document_ready, rows_present(), rows_present(index=1),
+                                     description=NOSCO_LISTING_URL)
 
-        return new_nosco_products
+        return parse_nosco_listing(driver.page_source)
 
-    def compare_site_to_pdw(self, site, site_prods, pdw_prods):
-        ''''''
+    def compare_site_to_pdw(self, site, site_prods, pdw_prods, deduper=None):
+        '''pdw_prods is a lookup from get_pdw_lookup or the dict from get_recent_pdw_products
+
+        Returns the canonical urls of the new notes, each once.  Pass the
+        run's NoteDeduper to also drop notes already found on another listing.
+        '''
+        deduper = deduper or NoteDeduper()
+        # A note on several listings (BMO's PPN and NPPN, say) is one product.
+        # Keyed on the listing's own code or url: pdwCusip is 'Error' for
+        # every code that doesn't parse
+        key = 'JHN Code / Cusip' if site == 'bmo' else 'urls'
+        site_prods = site_prods.drop_duplicates(key)
+        codes = site_prods['JHN Code / Cusip'] if site == 'bmo' else site_prods['pdwCusip']
+        # Listing codes learned to be aliases of a cusip (see NoteAliases)
+        aliases = deduper.aliases.resolve(codes) if deduper.aliases is not None else {}
+        resolved = codes.map(aliases)
         # Filter out any products already present in pdw
         #### rbc has come cusips, too. Need to account for those
-        new_active_products = site_prods[
-            (site_prods['pdwCusip'].isin(pdw_prods['cusip'])==False) &
-            (site_prods['pdwCusip'].isin(pdw_prods['isin'])==False)
-        ]
+        if hasattr(pdw_prods, 'known'):
+            existing = pdw_prods.known(list(site_prods['pdwCusip']) + list(resolved.dropna()))
+        else:
+            existing = set(pdw_prods['cusip']) | set(pdw_prods['isin'])
+        is_new = ~site_prods['pdwCusip'].isin(existing) & ~resolved.isin(existing)
+        new_active_products = site_prods[is_new]
         # Create list of product urls to return
         if site == 'bmo':
-            urls = ['https://www.bmonotes.com/Note/' + i for i in new_active_products['JHN Code / Cusip']]
+            urls = [bmo_note_url(i) for i in new_active_products['JHN Code / Cusip']]
         elif site in ['nbcss', 'rbc', 'desjardins', 'nosco']:
-            urls = new_active_products['urls'].unique()
+            urls = list(new_active_products['urls'])
+        pdw_cusips = new_active_products['pdwCusip'].where(new_active_products['pdwCusip'] != 'Error')
+        identifiers = zip(pdw_cusips, codes[is_new].where(codes[is_new] != 'Error'), resolved[is_new])
+        urls = [url for url in (deduper.claim(url, ids) for url, ids in zip(urls, identifiers))
+                if url is not None]
         print(urls)
         return urls
 
-    def close_driver(self):
-        self.driver.close()
+    def close_driver(self, broken=False):
+        '''Quit this Driver's browsers, or hand them back to its pool'''
+        for browser in self._browsers.values():
+            if self.browser_pool is not None:
+                self.browser_pool.release(browser, broken=broken)
+            else:
+                browser.quit()
+        self._browsers = {}
 
 
 if __name__ == '__main__':
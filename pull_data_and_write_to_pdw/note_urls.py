@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlite_batches import select_in
+
+
+BMO_NOTE_URL = 'https://www.bmonotes.com/Note/'
+DEFAULT_ALIASES_PATH = os.environ.get('PDW_NOTE_ALIASES', '/tmp/pdw_note_aliases.sqlite')
+
+
+def bmo_note_url(code):
+    '''The note page of a BMO JHN code or cusip'''
+    return BMO_NOTE_URL + str(code).strip().upper()
+
+
+def _identifiers(values):
+    # 'Error' is the pdw cusip of every listing code that doesn't parse
+    return [str(i) for i in values if i is not None and i == i and str(i) != 'Error']
+
+
+def _canonical_host(host):
+    from issuer_scraper import issuer_scrapers
+
+    for scraper in issuer_scrapers().values():
+        if host in scraper.hosts:
+            return scraper.hosts[0]
+    return host
+
+
+def canonical_url(url):
+    '''One spelling of a note page's url
+
+    Scheme and host are lower case (and the issuer's main host), the fragment
+    and any trailing slash are dropped and query parameters are sorted.
+    bmonotes paths are case-insensitive, so they become /Note/<CODE>.
+    '''
+    parts = urlsplit(str(url).strip())
+    host = _canonical_host(parts.netloc.lower())
+    path = parts.path.rstrip('/')
+    if host == urlsplit(BMO_NOTE_URL).netloc and path.lower().startswith('/note/'):
+        return bmo_note_url(path.rsplit('/', 1)[-1])
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower() or 'https', host, path, query, ''))
+
+
+class NoteAliases:
+    """Identifiers learned to belong to the same note, across runs.
+
+    A BMO note can be listed under its JHN code on one listing and its cusip
+    on another, and only its page shows both.  Once a scrape has seen the
+    pair, later runs resolve the alias before anything is fetched.
+    """
+
+    def __init__(self, path=DEFAULT_ALIASES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS note_aliases (
+                alias TEXT PRIMARY KEY,
+                identifier TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def add(self, alias, identifier):
+        if alias == identifier:
+            return
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO note_aliases VALUES (?, ?)',
+                              (alias, identifier))
+            self.conn.commit()
+
+    def resolve(self, codes):
+        """Return {code: identifier} for the codes that are known aliases."""
+        with self._lock:
+            return dict(select_in(
+                self.conn, 'SELECT alias, identifier FROM note_aliases WHERE alias IN ({})',
+                [str(code) for code in codes]))
+
+    def close(self):
+        self.conn.close()
+
+
+class NoteDeduper:
+    """Hand out each note once per run, whatever url or code it came under.
+
+    claim() canonicalizes the url and checks it and the note's identifiers
+    against everything claimed so far; a note whose url or any identifier
+    already belongs to another url is a duplicate.  Thread-safe, so the
+    listings and scrape batches of one run can share it.
+    """
+
+    def __init__(self, aliases=None):
+        self.aliases = aliases
+        self._lock = threading.Lock()
+        self._urls = set()
+        self._owners = {}
+
+    def claim(self, url, identifiers=()):
+        """Return the canonical url if the note is new to this run, else None."""
+        url = canonical_url(url)
+        identifiers = set(_identifiers(identifiers))
+        if self.aliases is not None and identifiers:
+            identifiers |= set(self.aliases.resolve(identifiers).values())
+        with self._lock:
+            if any(self._owners.get(i, url) != url for i in identifiers):
+                return None
+            for identifier in identifiers:
+                self._owners[identifier] = url
+            if url in self._urls:
+                return None
+            self._urls.add(url)
+        return url
+
+    def same_note(self, url, identifiers):
+        """Return the url that claimed these identifiers first, else None.
+
+        Called with what a scraped page revealed; if another url got there
+        first this page was an alias of it, which NoteAliases remembers.
+        """
+        url = canonical_url(url)
+        identifiers = _identifiers(identifiers)
+        with self._lock:
+            owner = next((self._owners[i] for i in identifiers
+                          if self._owners.get(i, url) != url), None)
+            if owner is None:
+                for identifier in identifiers:
+                    self._owners[identifier] = url
+        if self.aliases is not None and identifiers and url.startswith(BMO_NOTE_URL):
+            # The listing code in the url resolves to the page's cusip
+            self.aliases.add(url[len(BMO_NOTE_URL):], identifiers[0])
+        return owner
+
+    def unique(self, urls):
+        """The urls that are new to this run, canonical and in order."""
+        return [url for url in map(self.claim, urls) if url is not None]
@@ -1,25 +1,33 @@
+import os
 import requests
 import json
 import sys
 
 
-def get_new_token(client_id, client_secret):
-    """get new Oauth token, currently using PI's secrets"""
-    auth_server_url = 'https://buat.lumafintech.com/api/auth-service/oauth/token'
+AUTH_SERVER_URL = os.environ.get(
+    'PDW_AUTH_URL', 'https://buat.lumafintech.com/api/auth-service/oauth/token')
 
-    token_req_payload = {'grant_type': 'client_credentials', 'scope': 'serverclient'}
 
+class TokenError(Exception):
+    """Raised when the OAuth 2.0 server does not issue a token."""
+
+
+def request_token(client_id, client_secret, auth_server_url=AUTH_SERVER_URL):
+    """Request a client-credentials token and return the full token response."""
+    token_req_payload = {'grant_type': 'client_credentials', 'scope': 'serverclient'}
 
     token_response = requests.post(auth_server_url,
                                    data=token_req_payload, verify=False, allow_redirects=False,
-                                   auth=(client_id, client_secret))
+                                   auth=(client_id, client_secret), timeout=30)
 
     if token_response.status_code != 200:
         print("Failed to obtain token from the OAuth 2.0 server", file=sys.stderr)
-        sys.exit(1)
+        raise TokenError(f'Token request failed with status {token_response.status_code}')
 
     print("Successfully obtained a new token")
-    tokens = json.loads(token_response.text)
-    print(tokens['access_token'])
-    return tokens['access_token']
+    return json.loads(token_response.text)
+
 
+def get_new_token(client_id, client_secret):
+    """get new Oauth token, currently using PI's secrets"""
+    return request_token(client_id, client_secret)['access_token']
@@ -0,0 +1,103 @@
+DEFAULT_TIMEOUT = 30
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Row count plus first and last row text of one table, or null while the
+# table isn't in the DOM.  Changes whenever a listing moves to another page.
+_TABLE_SIGNATURE_JS = '''
+var table = document.querySelectorAll(arguments[0])[arguments[1]];
+if (!table) { return null; }
+var rows = table.querySelectorAll('tbody tr');
+if (!rows.length) { return [0, '', '']; }
+return [rows.length, rows[0].innerText, rows[rows.length - 1].innerText];
+'''
+
+_DATATABLES_IDLE_JS = '''
+var processing = document.getElementById(arguments[0] + '_processing');
+return !processing || window.getComputedStyle(processing).display === 'none';
+'''
+
+# Show every row of a DataTables table on one page; false when it already
+# fits on one page or isn't a DataTables table
+_DATATABLES_SHOW_ALL_JS = '''
+if (!window.jQuery || !jQuery.fn.dataTable || !jQuery.fn.dataTable.Api) { return false; }
+var table = jQuery('#' + arguments[0]).DataTable();
+if (table.page.len() === -1 || table.page.info().pages <= 1) { return false; }
+table.page.len(-1).draw(false);
+return true;
+'''
+
+
+def table_signature(driver, table_selector='table', index=0):
+    signature = driver.execute_script(_TABLE_SIGNATURE_JS, table_selector, index)
+    return tuple(signature) if signature is not None else None
+
+
+def document_ready(driver):
+    # 'interactive' is enough: every wait also checks for the content it
+    # needs, and with the eager load strategy 'complete' can be much later
+    return driver.execute_script('return document.readyState') != 'loading'
+
+
+def rows_present(table_selector='table', index=0):
+    """The table has rows and they aren't a 'Loading...' placeholder."""
+    def condition(driver):
+        signature = table_signature(driver, table_selector, index)
+        return (signature is not None and signature[0] > 0
+                and 'Loading...' not in signature[1])
+    return condition
+
+
+def rows_changed(previous, table_selector='table', index=0):
+    """The table shows different rows than `previous` (a table_signature)."""
+    def condition(driver):
+        signature = table_signature(driver, table_selector, index)
+        return (signature is not None and signature[0] > 0
+                and signature != previous)
+    return condition
+
+
+def datatables_idle(table_id):
+    """The DataTables 'processing' indicator of table_id is hidden."""
+    def condition(driver):
+        return driver.execute_script(_DATATABLES_IDLE_JS, table_id)
+    return condition
+
+
+def datatables_show_all(driver, table_id):
+    """Set table_id's page length to all rows; True if it had to redraw."""
+    return driver.execute_script(_DATATABLES_SHOW_ALL_JS, table_id)
+
+
+class PageReadiness:
+    """Wait for explicit DOM conditions instead of sleeping a fixed time.
+
+    Each site gets its own timeout and polling interval, so pages continue as
+    soon as they are ready and a slow site only waits as long as it needs.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def wait(self, driver, *conditions, description='page'):
+        """Poll until every condition holds; raise TimeoutException if not."""
+        from selenium.common.exceptions import (JavascriptException, NoSuchElementException,
+                                                StaleElementReferenceException)
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # Elements can vanish or be replaced mid-check while the page redraws
+        ignored = (JavascriptException, NoSuchElementException, StaleElementReferenceException)
+        WebDriverWait(driver, self.timeout, poll_frequency=self.poll_interval,
+                      ignored_exceptions=ignored).until(
+            lambda d: all(condition(d) for condition in conditions),
+            f'{description} not ready after {self.timeout}s')
+
+
+SITE_READINESS = {
+    'bmo': PageReadiness(timeout=30, poll_interval=0.2),
+    'nbcss': PageReadiness(timeout=30, poll_interval=0.25),
+    'rbc': PageReadiness(timeout=30, poll_interval=0.25),
+    # The Desjardins listing renders slowly behind its splash page
+    'desjardins': PageReadiness(timeout=60, poll_interval=0.5),
+    'nosco': PageReadiness(timeout=20, poll_interval=0.25),
+}
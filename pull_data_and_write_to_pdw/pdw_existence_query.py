@@ -0,0 +1,48 @@
+# Identifiers per $in query; keeps each query well under DocDB's limits
+QUERY_BATCH_SIZE = 500
+# Indexed productGeneral fields the candidates are looked up in
+LOOKUP_FIELDS = ['cusip', 'isin']
+
+
+class PdwExistenceQuery:
+    """Ask PDW which of a listing's identifiers it already has.
+
+    Instead of loading products into memory, known() sends batched $in
+    queries on each indexed identifier field, projecting only that field
+    (without _id) so the index can cover the query.  Cost grows with the
+    number of candidates, not with how many products PDW holds.
+    """
+
+    def __init__(self, collection=None, batch_size=QUERY_BATCH_SIZE):
+        self._collection = collection
+        self.batch_size = batch_size
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from pdw_mongo import pdw_products_collection
+
+            self._collection = pdw_products_collection()
+        return self._collection
+
+    def known(self, identifiers):
+        """Return the subset of identifiers that exist in PDW."""
+        from pdw_mongo import stream
+
+        identifiers = sorted({str(i) for i in identifiers})
+        found = set()
+        for i in range(0, len(identifiers), self.batch_size):
+            remaining = identifiers[i:i + self.batch_size]
+            for field in LOOKUP_FIELDS:
+                path = f'productGeneral.{field}'
+                for document in stream(self.collection, {path: {'$in': remaining}}, [path]):
+                    found.add(document['productGeneral'][field])
+                # Codes already found as a cusip aren't looked up as an isin
+                remaining = [code for code in remaining if code not in found]
+                if not remaining:
+                    break
+        return found
+
+    def close(self):
+        # The client is shared (see pdw_mongo), so it stays open
+        self._collection = None
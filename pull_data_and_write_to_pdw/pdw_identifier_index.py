@@ -0,0 +1,128 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from sqlite_batches import select_in
+
+
+DEFAULT_INDEX_PATH = os.environ.get('PDW_IDENTIFIER_INDEX', '/tmp/pdw_identifier_index.sqlite')
+# Documents fetched per Mongo round trip and written per transaction
+SYNC_BATCH_SIZE = 1000
+# productGeneral fields that identify a product in PDW
+IDENTIFIER_FIELDS = ['cusip', 'isin', 'fundservID']
+
+
+def index_is_durable(path=DEFAULT_INDEX_PATH):
+    """Whether an index at path is worth syncing: it already exists, or
+    PDW_IDENTIFIER_INDEX points it somewhere that outlives the container."""
+    return os.path.exists(path) or 'PDW_IDENTIFIER_INDEX' in os.environ
+
+
+class PdwIdentifierIndex:
+    """Every CUSIP, ISIN and FundSERV ID in PDW, kept in a local SQLite file.
+
+    sync() only fetches documents created since the newest createTimestamp
+    already indexed, so after the first sync each run transfers just the new
+    products, and lookups cover all of PDW's history rather than a recent
+    window.  That only pays off where the file outlives the process, so
+    PDW_IDENTIFIER_INDEX should point at durable storage (see index_is_durable).
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS identifiers (
+                identifier TEXT PRIMARY KEY,
+                kind TEXT NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value
+            )
+        ''')
+        self.conn.commit()
+
+    @property
+    def watermark(self):
+        """createTimestamp of the newest indexed document, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM sync_state WHERE name = 'watermark'").fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row else None
+
+    def sync(self, collection=None, batch_size=SYNC_BATCH_SIZE):
+        """Index the documents created since the watermark; return how many
+        added an identifier.
+
+        The watermark moves forward with each batch, so an interrupted sync
+        resumes where it stopped.  Documents at exactly the watermark are
+        fetched again and ignored, so none created in the same instant as
+        the last batch are missed.
+        """
+        from pdw_mongo import pdw_products_collection, stream
+
+        if collection is None:
+            collection = pdw_products_collection()
+        watermark = self.watermark
+        query = {'createTimestamp': {'$gte': watermark}} if watermark else {}
+        fields = ['createTimestamp'] + [f'productGeneral.{field}' for field in IDENTIFIER_FIELDS]
+        cursor = stream(collection, query, fields, sort=('createTimestamp', 1), batch_size=batch_size)
+
+        count = 0
+        batch = []
+        for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                count += self._index(batch)
+                batch = []
+        if batch:
+            count += self._index(batch)
+        return count
+
+    def _index(self, documents):
+        """Index a batch of documents; return how many added an identifier."""
+        rows = []
+        identifiers = []
+        newest = None
+        for document in documents:
+            general = document.get('productGeneral', {})
+            identifiers.append([str(general[field]) for field in IDENTIFIER_FIELDS if general.get(field)])
+            rows += [(str(general[field]), field) for field in IDENTIFIER_FIELDS if general.get(field)]
+            created = document.get('createTimestamp')
+            if created is not None and (newest is None or created > newest):
+                newest = created
+        with self._lock, self.conn:
+            # Documents re-fetched at the watermark are already indexed
+            known = {row[0] for row in select_in(
+                self.conn, 'SELECT identifier FROM identifiers WHERE identifier IN ({})',
+                {identifier for identifier, _ in rows})}
+            self.conn.executemany('INSERT OR IGNORE INTO identifiers VALUES (?, ?)', rows)
+            if newest is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES ('watermark', ?)",
+                    (newest.isoformat(),))
+        return sum(1 for ids in identifiers if any(i not in known for i in ids))
+
+    def known(self, identifiers):
+        """Return the subset of identifiers that exist in PDW."""
+        with self._lock:
+            return {row[0] for row in select_in(
+                self.conn, 'SELECT identifier FROM identifiers WHERE identifier IN ({})',
+                {str(i) for i in identifiers})}
+
+    def __contains__(self, identifier):
+        with self._lock:
+            return self.conn.execute(
+                'SELECT 1 FROM identifiers WHERE identifier = ?', (str(identifier),)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM identifiers').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,73 @@
+import os
+import threading
+
+
+DOCDB_USER = "dbadmin"
+DOCDB_HOST = "dev-documentdb.cluster-cb6kajicuplh.us-east-1.docdb.amazonaws.com"
+DOCDB_PORT = "27017"
+DOCDB_OPTIONS = "tls=true&tlsAllowInvalidCertificates=true&replicaSet=rs0&readPreference=secondaryPreferred&retryWrites=false"
+PDW_DATABASE = 'product-uat'
+# Point the crawler at a local mongod (mongodb://localhost:27017) or at an
+# in-memory mongomock database (mongomock://) instead of DocDB
+MONGO_URI = os.environ.get('PDW_MONGO_URI')
+MAX_POOL_SIZE = 10
+# Documents per getMore round trip when streaming a cursor
+DEFAULT_BATCH_SIZE = 1000
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def pdw_connection_string():
+    '''Connection string for DocDB, with the password from the keyring'''
+    import keyring
+
+    password = keyring.get_password('docdb_prod_dbadmin', DOCDB_USER)
+    cxn_string_template = "mongodb://{}:{}@{}:{}/?{}"
+    return cxn_string_template.format(DOCDB_USER, password, DOCDB_HOST, DOCDB_PORT, DOCDB_OPTIONS)
+
+
+def get_pdw_client():
+    '''The process-wide MongoClient, created on first use
+
+    MongoClient pools its connections and is thread-safe, so every lookup
+    shares this one instead of opening (and leaking) a client per call.
+    '''
+    global _client
+    with _client_lock:
+        if _client is None:
+            if MONGO_URI and MONGO_URI.startswith('mongomock://'):
+                import mongomock
+
+                _client = mongomock.MongoClient()
+            else:
+                from pymongo import MongoClient
+
+                _client = MongoClient(MONGO_URI or pdw_connection_string(), maxPoolSize=MAX_POOL_SIZE)
+        return _client
+
+
+def close_pdw_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def pdw_products_collection():
+    '''The PdwProductCore collection'''
+    return get_pdw_client()[PDW_DATABASE].PdwProductCore
+
+
+def stream(collection, query, fields, sort=None, batch_size=DEFAULT_BATCH_SIZE):
+    '''Iterate over the matching documents, fetching batch_size at a time
+
+    Only `fields` are returned (never _id), so documents stay small and an
+    index on those fields can cover the query.
+    '''
+    projection = dict({'_id': 0}, **{field: 1 for field in fields})
+    cursor = collection.find(query, projection).batch_size(batch_size)
+    if sort is not None:
+        cursor = cursor.sort(*sort)
+    yield from cursor
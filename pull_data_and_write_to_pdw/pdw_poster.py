@@ -0,0 +1,187 @@
+import email.utils
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from call_product_api import PDW_PRODUCTS_URL
+from oauth_access_token import TokenError
+
+
+DEFAULT_MAX_WORKERS = 8
+# (connect, read) timeouts in seconds for every POST
+DEFAULT_TIMEOUT = (5, 30)
+# Responses whose Retry-After header says when to send again
+RETRY_AFTER_STATUS = {429, 503}
+
+
+def product_identifier(product):
+    """ISIN of a product, falling back to its CUSIP."""
+    general = product.get('productGeneral', {})
+    return general.get('isin') or general.get('cusip')
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delay or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class PdwPoster:
+    """Post products to the PDW API over one pooled keep-alive session.
+
+    `token` is either an access token string or a TokenManager; with a
+    TokenManager a 401 refreshes the token and retries the product once.
+    With a PostingLedger, products already posted with the same payload are
+    skipped without a request and every outcome is recorded.  With a
+    RetryQueue, failed payloads are queued for `retry_queue.drain`.
+    """
+
+    def __init__(self, token, max_workers=DEFAULT_MAX_WORKERS,
+                 timeout=DEFAULT_TIMEOUT, url=PDW_PRODUCTS_URL, ledger=None,
+                 retry_queue=None, verbose=True):
+        self.token = token
+        self.verbose = verbose
+        self.ledger = ledger
+        self.retry_queue = retry_queue
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.url = url
+        self.session = requests.Session()
+        # One connection per worker so no thread waits on the pool
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _access_token(self):
+        if isinstance(self.token, str):
+            return self.token
+        return self.token.get_token()
+
+    def _post(self, product):
+        access_token = self._access_token()
+        headers = {
+            'Authorization': 'Bearer ' + access_token,
+            'Content-Type': 'application/json',
+        }
+        response = self.session.post(self.url, headers=headers,
+                                     data=json.dumps(product),
+                                     timeout=self.timeout)
+        if response.status_code == 401 and not isinstance(self.token, str):
+            self.token.invalidate(access_token)
+            headers['Authorization'] = 'Bearer ' + self._access_token()
+            response = self.session.post(self.url, headers=headers,
+                                         data=json.dumps(product),
+                                         timeout=self.timeout)
+        return response
+
+    @staticmethod
+    def _new_result(key, product):
+        return {
+            'key': key,
+            'isin': product_identifier(product),
+            'success': False,
+            'status_code': None,
+            'content': None,
+            'error': None,
+            'elapsed': None,
+            'retry_after': None,
+            'skipped': False,
+        }
+
+    def post_product(self, key, product):
+        """Post a single product and return its result record."""
+        if isinstance(product, str):
+            product = json.loads(product)
+        result = self._new_result(key, product)
+        start = time.perf_counter()
+        try:
+            response = self._post(product)
+            result['status_code'] = response.status_code
+            result['content'] = response.text
+            result['success'] = response.status_code == 200
+            if response.status_code in RETRY_AFTER_STATUS:
+                result['retry_after'] = retry_after_seconds(
+                    response.headers.get('Retry-After'))
+        except (requests.RequestException, TokenError) as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+        result['elapsed'] = time.perf_counter() - start
+
+        return result
+
+    def post_products(self, products):
+        """Post {key: product} concurrently and return results in key order."""
+        products = {key: json.loads(product) if isinstance(product, str)
+                    else product for key, product in products.items()}
+        skipped = []
+        to_post = products
+        if self.ledger is not None:
+            to_post, skipped = self.ledger.filter_unposted(products)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                key: executor.submit(self.post_product, key, product)
+                for key, product in to_post.items()
+            }
+            posted = {key: future.result() for key, future in futures.items()}
+
+        if self.ledger is not None:
+            self.ledger.record_many([
+                (to_post[key], result['status_code'])
+                for key, result in posted.items()
+                if result['status_code'] is not None
+            ])
+        if self.retry_queue is not None:
+            for key, result in posted.items():
+                if not result['success']:
+                    self.retry_queue.enqueue(key, to_post[key],
+                                             result['status_code'],
+                                             result['error'] or result['content'],
+                                             result['retry_after'])
+            self.retry_queue.remove(
+                [key for key in products
+                 if key not in posted or posted[key]['success']])
+
+        results = []
+        for key, product in products.items():
+            if key in posted:
+                results.append(posted[key])
+            else:
+                result = self._new_result(key, product)
+                result.update(success=True, skipped=True, elapsed=0.0)
+                results.append(result)
+        if skipped:
+            print(f'{len(skipped)} product(s) unchanged since their last post, '
+                  'skipped')
+
+        for result in posted.values():
+            if not self.verbose:
+                break
+            if result['success']:
+                print(f'Product {result["isin"]} posted in '
+                      f'{result["elapsed"]:.2f}s')
+            else:
+                print(f'Product {result["isin"]} failed with error message: '
+                      f'{result["error"] or result["content"]}')
+
+        return results
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,157 @@
+import json
+import os
+import re
+from collections import defaultdict
+
+import fastjsonschema
+
+from field_catalog import load_field_catalog
+
+
+EXAMPLE_PRODUCT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'product.json')
+DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}$'
+
+# Sections gen_pdw_json always emits, plus the fields the PDW API needs to
+# identify a product
+REQUIRED_SECTIONS = [
+    'productGeneral',
+    'productProtection',
+    'productCall',
+    'productYield',
+    'productGrowth',
+]
+REQUIRED_GENERAL_FIELDS = ['issuer', 'wrapperType']
+
+# JSON schema for each field catalog type
+CATALOG_TYPE_SCHEMAS = {
+    'array': {'type': 'array'},
+    'boolean': {'type': 'boolean'},
+    'date': {'type': 'string', 'pattern': DATE_PATTERN},
+    'integer': {'type': 'integer'},
+    'number': {'type': 'number'},
+    'string': {'type': 'string'},
+}
+
+_validator_cache = {}
+
+
+def _schema_from_example(value):
+    """Infer a JSON schema fragment from an example value in product.json."""
+    if isinstance(value, bool):
+        return {'type': 'boolean'}
+    if isinstance(value, (int, float)):
+        return {'type': 'number'}
+    if isinstance(value, str):
+        if re.match(DATE_PATTERN, value):
+            return {'type': 'string', 'pattern': DATE_PATTERN}
+        return {'type': 'string'}
+    if isinstance(value, list):
+        if value:
+            return {'type': 'array', 'items': _schema_from_example(value[0])}
+        return {'type': 'array'}
+    if isinstance(value, dict):
+        return {
+            'type': 'object',
+            'properties': {k: _schema_from_example(v)
+                           for k, v in value.items()},
+        }
+    return {}
+
+
+def _add_field(schema, path, field_schema):
+    """Add a dotted PDW field to the schema without overriding the example."""
+    node = schema
+    for part in path[:-1]:
+        node.setdefault('type', 'object')
+        node = node.setdefault('properties', {}).setdefault(part, {})
+        if node.get('type') == 'array':
+            node = node.setdefault('items', {})
+    node.setdefault('type', 'object')
+    node.setdefault('properties', {}).setdefault(path[-1], field_schema)
+
+
+def build_pdw_schema(example_path=EXAMPLE_PRODUCT_PATH, catalog=None):
+    """Build the PDW payload schema from product.json and the field catalog."""
+    with open(example_path) as f:
+        example = json.load(f)
+    # Timestamps and versioning are set by PDW, not by us
+    for key in ['version', 'createTimestamp']:
+        example.pop(key, None)
+
+    schema = _schema_from_example(example)
+    schema['$schema'] = 'http://json-schema.org/draft-07/schema#'
+    catalog = catalog or load_field_catalog()
+    for field in catalog.payload_fields:
+        _add_field(schema, field['path'],
+                   dict(CATALOG_TYPE_SCHEMAS.get(field['type'], {})))
+
+    schema['required'] = REQUIRED_SECTIONS
+    general = schema['properties']['productGeneral']
+    general['required'] = REQUIRED_GENERAL_FIELDS
+    # Every product needs at least one identifier to be posted
+    general['anyOf'] = [{'required': ['isin']}, {'required': ['cusip']}]
+
+    return schema
+
+
+def compile_pdw_validator(example_path=EXAMPLE_PRODUCT_PATH, catalog=None):
+    """Compile the PDW schema once per process and return it with its validator."""
+    catalog = catalog or load_field_catalog()
+    cache_key = (example_path, catalog.catalog_id)
+    if cache_key not in _validator_cache:
+        schema = build_pdw_schema(example_path, catalog)
+        _validator_cache[cache_key] = (schema, fastjsonschema.compile(schema))
+    return _validator_cache[cache_key]
+
+
+def _describe_error(error):
+    """Return the field an error belongs to and a short message for it."""
+    # Point "required" errors at the missing field rather than its parent
+    path = [str(p) for p in error.absolute_path if not isinstance(p, int)]
+    message = error.message
+    if error.validator == 'required':
+        missing = re.match(r"'(.+)' is a required property", error.message)
+        if missing:
+            path.append(missing.group(1))
+    elif error.validator == 'anyOf':
+        path.append('isin|cusip')
+        message = 'an isin or cusip is required'
+    return '.'.join(path) or '<root>', message
+
+
+def validate_pdw_batch(products, example_path=EXAMPLE_PRODUCT_PATH,
+                       catalog=None):
+    """Validate a batch of products before posting.
+
+    Returns the valid products and the errors grouped by field as
+    {field: {product_key: [messages]}}.
+    """
+    schema, fast_validate = compile_pdw_validator(example_path, catalog)
+    full_validator = None
+    valid = {}
+    errors_by_field = defaultdict(lambda: defaultdict(list))
+    for key, product in products.items():
+        if isinstance(product, str):
+            product = json.loads(product)
+        try:
+            fast_validate(product)
+            valid[key] = product
+        except fastjsonschema.JsonSchemaException:
+            # Only pay for a full error report on products that fail
+            if full_validator is None:
+                from jsonschema import Draft7Validator
+                full_validator = Draft7Validator(schema)
+            for error in full_validator.iter_errors(product):
+                field, message = _describe_error(error)
+                errors_by_field[field][key].append(message)
+
+    return valid, {field: dict(keys) for field, keys in errors_by_field.items()}
+
+
+def print_validation_report(errors_by_field):
+    """Print the grouped validation errors."""
+    for field, keys in sorted(errors_by_field.items()):
+        print(f'{field}: {len(keys)} product(s) failed validation')
+        for key, messages in keys.items():
+            print(f'    {key}: {"; ".join(messages)}')
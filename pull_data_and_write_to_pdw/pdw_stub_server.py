@@ -0,0 +1,129 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+AUTH_PATH = '/api/auth-service/oauth/token'
+PRODUCTS_PATH = '/api/pdw-service/v2/products/'
+
+
+class StubConfig:
+    """Latency and failure behaviour of the stand-in PDW and auth services."""
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0,
+                 throttle_rate=0.0, token_expires_in=3600, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.token_expires_in = token_expires_in
+        self.random = random.Random(seed)
+        self.tokens = set()
+        self.stats = {'tokens': 0, 'posts': 0, 'errors': 0, 'throttled': 0,
+                      'unauthorized': 0}
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real services
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _count(self, stat):
+        config = self.server.config
+        with config.lock:
+            config.stats[stat] += 1
+
+    def do_POST(self):
+        config = self.server.config
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == AUTH_PATH:
+            token = uuid.uuid4().hex
+            with config.lock:
+                config.tokens.add(token)
+            self._count('tokens')
+            return self._send(200, {
+                'access_token': token,
+                'token_type': 'bearer',
+                'expires_in': config.token_expires_in,
+            })
+        if self.path.rstrip('/') != PRODUCTS_PATH.rstrip('/'):
+            return self._send(404, {'error': 'not found'})
+
+        with config.lock:
+            delay = max(0.0, config.random.gauss(config.latency,
+                                                 config.jitter))
+            roll = config.random.random()
+        time.sleep(delay)
+        token = self.headers.get('Authorization', '')[len('Bearer '):]
+        if token not in config.tokens:
+            self._count('unauthorized')
+            return self._send(401, {'error': 'invalid_token'})
+        if roll < config.throttle_rate:
+            self._count('throttled')
+            return self._send(429, {'error': 'too many requests'},
+                              {'Retry-After': '1'})
+        if roll < config.throttle_rate + config.error_rate:
+            self._count('errors')
+            return self._send(500, {'error': 'internal error'})
+        try:
+            product = json.loads(body)
+            isin = product['productGeneral'].get('isin')
+        except (ValueError, KeyError, TypeError):
+            self._count('errors')
+            return self._send(400, {'error': 'malformed product'})
+        self._count('posts')
+        return self._send(200, {'isin': isin, 'id': uuid.uuid4().hex})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under load-test concurrency
+    request_queue_size = 128
+
+
+def start_stub_server(config=None, host='127.0.0.1', port=0):
+    """Start the stand-in server on a background thread.
+
+    Returns the server and its base URL; call server.shutdown() to stop it.
+    """
+    server = StubServer((host, port), StubHandler)
+    server.config = config or StubConfig()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for the PDW products and auth services')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubServer(('127.0.0.1', args.port), StubHandler)
+    server.config = StubConfig(args.latency, args.jitter, args.error_rate,
+                               args.throttle_rate)
+    print(f'Serving PDW_AUTH_URL=http://127.0.0.1:{args.port}{AUTH_PATH} '
+          f'PDW_PRODUCTS_URL=http://127.0.0.1:{args.port}{PRODUCTS_PATH}')
+    server.serve_forever()
@@ -0,0 +1,344 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from deadline import CostEstimator
+from issuer_scraper import (NoteFetcher, failed_urls, group_urls_by_issuer, issuer_scrapers,
+                            scrape_issuers)
+from note_urls import NoteDeduper, bmo_note_url
+from pdw_schema import print_validation_report, validate_pdw_batch
+
+
+DEFAULT_QUEUE_SIZE = 50
+# Notes handed to one scrape run, and products handed to one post batch
+DEFAULT_SCRAPE_BATCH_SIZE = 5
+DEFAULT_POST_BATCH_SIZE = 20
+# How often a blocked stage checks whether the pipeline was stopped
+POLL_INTERVAL = 0.5
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+class Pipeline:
+    """Crawl, scrape and post BMO notes as stages joined by bounded queues.
+
+    Note URLs start scraping while the listings are still paginating, and
+    products post as soon as a scrape batch finishes.  When a queue is full
+    the stage feeding it waits, so a slow stage throttles the ones before it.
+
+    With a PipelineCheckpoint, progress is saved as it happens and a new run
+    picks up the URLs and payloads the previous run left unfinished.
+
+    With a Deadline, each stage checks the estimated cost of its next step
+    against the time left.  Fetching new pages and notes stops first, so the
+    remaining time goes to posting payloads that are already scraped, and the
+    run winds down with its checkpoint saved before the hard timeout.
+
+    With a ListingSnapshot the crawl is incremental and only compares the
+    listing rows that changed since the previous crawl.  A deferred snapshot
+    only records a new note's row once it has posted, so a note that fails
+    is offered again.  pdw_lookup picks how
+    listing codes are checked against PDW (see Driver.get_pdw_lookup).
+
+    Every url is canonicalized and a note_deduper (a NoteDeduper, by default
+    one for this run) drops notes seen on another listing or under another
+    code, so no note is scraped or posted twice in a run.  With a PriceStore
+    the scraped notes' mark-to-market prices are captured as well.
+    """
+
+    def __init__(self, driver, poster, queue_size=DEFAULT_QUEUE_SIZE,
+                 scrape_batch_size=DEFAULT_SCRAPE_BATCH_SIZE,
+                 post_batch_size=DEFAULT_POST_BATCH_SIZE, checkpoint=None,
+                 deadline=None, cost_estimator=None, listing_snapshot=None,
+                 pdw_lookup='auto', note_deduper=None, price_store=None):
+        self.driver = driver
+        self.price_store = price_store
+        self.note_deduper = note_deduper or NoteDeduper()
+        # One NoteFetcher per issuer for the whole run, so its pooled
+        # connections and rate limit carry over from batch to batch
+        self._fetchers = {}
+        self.listing_snapshot = listing_snapshot
+        # Note key -> pdw cusip of its listing row, recorded once it posts
+        self._listing_codes = {}
+        # Keys of the notes an earlier run left unscraped or unposted, and of
+        # those posted by this run; resumed notes can post before their
+        # listing row is read
+        self._resumed_keys = set()
+        self._posted_keys = set()
+        self._listing_lock = threading.Lock()
+        self.pdw_lookup = pdw_lookup
+        self.poster = poster
+        self.checkpoint = checkpoint
+        self.deadline = deadline
+        self.costs = cost_estimator or CostEstimator()
+        self.winding_down = threading.Event()
+        self.scrape_batch_size = scrape_batch_size
+        self.post_batch_size = post_batch_size
+        self.url_queue = queue.Queue(maxsize=queue_size)
+        self.product_queue = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.stage_errors = []
+        self.product_list_success = []
+        self.product_list_error = []
+        self.scrape_errors = {}
+
+    def _put(self, q, item):
+        while True:
+            if self.stopped.is_set():
+                raise PipelineStopped()
+            try:
+                return q.put(item, timeout=POLL_INTERVAL)
+            except queue.Full:
+                pass
+
+    def _get(self, q):
+        while True:
+            if self.stopped.is_set():
+                raise PipelineStopped()
+            try:
+                return q.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+    def _take(self, q, size):
+        """Block for one item, then take whatever else is ready up to size.
+
+        Returns the items and whether the upstream stage has finished.
+        """
+        items = []
+        item = self._get(q)
+        while item is not _DONE:
+            items.append(item)
+            if len(items) >= size:
+                return items, False
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                return items, False
+        return items, True
+
+    def _has_time_for(self, **items_per_stage):
+        """Whether the estimated cost of the given work fits the deadline."""
+        if self.winding_down.is_set():
+            return False
+        if self.deadline is None:
+            return True
+        needed = sum(self.costs.estimate(stage, items)
+                     for stage, items in items_per_stage.items())
+        if self.deadline.has_time_for(needed):
+            return True
+        print(f'{self.deadline.remaining():.0f}s left, not enough for '
+              f'{needed:.0f}s of {", ".join(items_per_stage)}; winding down')
+        self.winding_down.set()
+        return False
+
+    def crawl_stage(self):
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            # Resume notes found by an earlier run before crawling again
+            urls = self.note_deduper.unique(checkpoint.pending_urls())
+            self._resumed_keys.update(url.rsplit('/', 1)[-1] for url in urls)
+            self._resumed_keys.update(checkpoint.unposted_products())
+            for url in urls:
+                self._put(self.url_queue, url)
+            if checkpoint.crawl_complete:
+                return
+        # Prepare what the listings' pdw cusips are checked against (e.g.
+        # sync the identifier index) while the first listing page loads
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pdw_lookup = executor.submit(self.driver.get_pdw_lookup, self.pdw_lookup)
+            try:
+                complete = self._crawl_listings(pdw_lookup)
+            finally:
+                # Waits for the lookup if the crawl stopped before using it
+                if pdw_lookup.exception() is None:
+                    pdw_lookup.result().close()
+        if complete and checkpoint is not None:
+            checkpoint.mark_crawl_complete()
+
+    def _crawl_listings(self, pdw_lookup):
+        """Queue the new notes of each listing page; False if cut short.
+
+        pdw_lookup is a future, only waited on once a page is ready to compare.
+        """
+        checkpoint = self.checkpoint
+        # Compare each listing page as soon as it is read
+        pages = self.driver.iter_bmo_product_pages(snapshot=self.listing_snapshot)
+        while True:
+            if not self._has_time_for(page=1, scrape=1, post=1):
+                # Stopped early; the next run crawls again
+                return False
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return True
+            self.costs.observe('page', time.perf_counter() - start)
+            urls = self.driver.compare_site_to_pdw('bmo', page,
+                                                   pdw_lookup.result(),
+                                                   self.note_deduper)
+            if self.listing_snapshot is not None:
+                self._stage_listing_rows(page, urls)
+            if checkpoint is not None:
+                urls = [url for url in urls
+                        if not checkpoint.is_discovered(url)]
+                checkpoint.mark_discovered(urls)
+            for url in urls:
+                self._put(self.url_queue, url)
+
+    def _stage_listing_rows(self, page, urls):
+        # Rows that produced no new note (already in PDW, or a duplicate) are
+        # done with; the rest, and those of notes resumed from the checkpoint,
+        # wait for their note to post
+        handled = []
+        with self._listing_lock:
+            waiting = ({url.rsplit('/', 1)[-1] for url in urls} | self._resumed_keys) - self._posted_keys
+            for code, pdw_cusip in zip(page['JHN Code / Cusip'], page['pdwCusip']):
+                key = bmo_note_url(code).rsplit('/', 1)[-1]
+                if key in waiting:
+                    self._listing_codes[key] = pdw_cusip
+                else:
+                    handled.append(pdw_cusip)
+        self.listing_snapshot.record('bmo', handled)
+
+    def scrape_stage(self):
+        if self.checkpoint is not None:
+            # Payloads scraped by an earlier run that never got posted
+            for key, product in self.checkpoint.unposted_products().items():
+                self._put(self.product_queue, (key, product))
+        done = False
+        while not done:
+            urls, done = self._take(self.url_queue, self.scrape_batch_size)
+            if not urls:
+                continue
+            # Leave unscraped notes to the next run (they stay pending in
+            # the checkpoint) while the queue drains
+            if not self._has_time_for(scrape=len(urls), post=len(urls)):
+                if self.checkpoint is None:
+                    print(f'Not scraped before the deadline: {urls}')
+                continue
+            start = time.perf_counter()
+            # Each issuer's notes go to its own rule pack, all at once
+            urls_by_issuer = group_urls_by_issuer(urls)
+            result, errors = scrape_issuers(urls_by_issuer,
+                                            deduper=self.note_deduper,
+                                            fetchers=self._issuer_fetchers(urls_by_issuer),
+                                            price_store=self.price_store)
+            self.costs.observe('scrape', time.perf_counter() - start, len(urls))
+            for issuer_errors in errors.values():
+                self.scrape_errors.update(issuer_errors)
+            if self.checkpoint is not None:
+                # Pages that failed to load stay pending for the next run
+                failed = failed_urls(urls_by_issuer, errors)
+                self.checkpoint.mark_scraped(
+                    [url for url in urls if url not in failed], result)
+            for key, product in result.items():
+                self._put(self.product_queue, (key, product))
+
+    def _issuer_fetchers(self, issuers):
+        scrapers = issuer_scrapers()
+        for issuer in issuers:
+            if issuer not in self._fetchers:
+                self._fetchers[issuer] = NoteFetcher(scrapers[issuer].max_workers,
+                                                     scrapers[issuer].request_interval)
+        return self._fetchers
+
+    def post_stage(self):
+        done = False
+        while not done:
+            items, done = self._take(self.product_queue, self.post_batch_size)
+            if not items:
+                continue
+            # Posting only needs its own time, so it carries on after the
+            # other stages have stopped for the deadline
+            if (self.deadline is not None and not self.deadline.has_time_for(
+                    self.costs.estimate('post', len(items)))):
+                self.winding_down.set()
+                if self.checkpoint is None:
+                    print(f'Not posted before the deadline: '
+                          f'{[key for key, _ in items]}')
+                continue
+            # Validate locally so bad payloads never hit the API
+            products, validation_errors = validate_pdw_batch(dict(items))
+            print_validation_report(validation_errors)
+            self.product_list_error += sorted(
+                {key for keys in validation_errors.values() for key in keys})
+            start = time.perf_counter()
+            post_results = self.poster.post_products(products)
+            self.costs.observe('post', time.perf_counter() - start,
+                               len(post_results))
+            for result in post_results:
+                if result['success']:
+                    self.product_list_success.append(result['key'])
+                else:
+                    self.product_list_error.append(result['key'])
+            if self.listing_snapshot is not None:
+                with self._listing_lock:
+                    posted = [result['key'] for result in post_results if result['success']]
+                    self._posted_keys.update(posted)
+                    codes = [self._listing_codes[key] for key in posted if key in self._listing_codes]
+                self.listing_snapshot.record('bmo', codes)
+            # Failed posts are in the retry queue, so they count as handled
+            if self.checkpoint is not None:
+                self.checkpoint.mark_posted(key for key, _ in items)
+
+    def _run_stage(self, stage, output_queue):
+        try:
+            stage()
+            if output_queue is not None:
+                self._put(output_queue, _DONE)
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            self.stage_errors.append((stage.__name__, e))
+            self.stopped.set()
+
+    def run(self):
+        """Run all stages to completion and return the post summary."""
+        threads = [
+            threading.Thread(target=self._run_stage,
+                             args=(self.crawl_stage, self.url_queue)),
+            threading.Thread(target=self._run_stage,
+                             args=(self.scrape_stage, self.product_queue)),
+            threading.Thread(target=self._run_stage,
+                             args=(self.post_stage, None)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for fetcher in self._fetchers.values():
+            fetcher.close()
+        if self.price_store is not None:
+            # One file per day rather than one per scrape batch
+            try:
+                self.price_store.flush()
+            except Exception as e:
+                print(f'Could not save mark-to-market prices: {e!r}')
+        if self.stage_errors:
+            if self.checkpoint is not None:
+                self.checkpoint.save(force=True)
+            stage_name, error = self.stage_errors[0]
+            raise RuntimeError(f'Pipeline stage {stage_name} failed') from error
+        if self.checkpoint is not None:
+            if self.winding_down.is_set():
+                self.checkpoint.save(force=True)
+            else:
+                # Finished cleanly; the next run starts from scratch apart
+                # from the notes whose pages failed to load
+                pending = self.checkpoint.pending_urls()
+                self.checkpoint.clear()
+                if pending:
+                    self.checkpoint.mark_discovered(pending)
+                    self.checkpoint.save(force=True)
+
+        return {
+            'success': self.product_list_success,
+            'error': self.product_list_error,
+            'scrape_errors': self.scrape_errors,
+            'complete': not self.winding_down.is_set(),
+        }
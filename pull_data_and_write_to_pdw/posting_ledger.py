@@ -0,0 +1,105 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from pdw_poster import product_identifier
+from sqlite_batches import select_in
+
+
+DEFAULT_LEDGER_PATH = os.environ.get('PDW_POSTING_LEDGER', '/tmp/pdw_posting_ledger.sqlite')
+
+
+def payload_hash(product):
+    """Stable hash of a product payload, independent of key order."""
+    if isinstance(product, str):
+        product = json.loads(product)
+    return hashlib.sha256(
+        json.dumps(product, sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+
+
+def ledger_key(product):
+    if isinstance(product, str):
+        product = json.loads(product)
+    return product_identifier(product)
+
+
+class PostingLedger:
+    """Record of every product posted to PDW, keyed by ISIN/CUSIP."""
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS postings (
+                product_key TEXT PRIMARY KEY,
+                payload_hash TEXT NOT NULL,
+                posted_at TEXT NOT NULL,
+                status_code INTEGER
+            )
+        ''')
+        self.conn.commit()
+
+    def posted_hashes(self, product_keys):
+        """Return {product_key: payload_hash} of successful posts."""
+        with self._lock:
+            return dict(select_in(
+                self.conn,
+                'SELECT product_key, payload_hash FROM postings '
+                'WHERE status_code = 200 AND product_key IN ({})', product_keys))
+
+    def filter_unposted(self, products):
+        """Split {key: product} into products to post and unchanged ones.
+
+        A product is skipped when its ISIN/CUSIP was already posted
+        successfully with an identical payload.
+        """
+        hashes = {key: payload_hash(product)
+                  for key, product in products.items()}
+        identifiers = {key: ledger_key(product)
+                       for key, product in products.items()}
+        posted = self.posted_hashes(
+            {i for i in identifiers.values() if i is not None})
+        to_post = {}
+        skipped = []
+        for key, product in products.items():
+            if posted.get(identifiers[key]) == hashes[key]:
+                skipped.append(key)
+            else:
+                to_post[key] = product
+        return to_post, skipped
+
+    def record(self, product, status_code):
+        """Record the outcome of a POST for a product."""
+        self.record_many([(product, status_code)])
+
+    def record_many(self, outcomes):
+        """Record [(product, status_code)] in one transaction."""
+        successes = []
+        failures = []
+        now = datetime.datetime.utcnow().isoformat()
+        for product, status_code in outcomes:
+            key = ledger_key(product)
+            if key is None:
+                continue
+            row = (key, payload_hash(product), now, status_code)
+            if status_code == 200:
+                successes.append(row)
+            else:
+                failures.append(row + (key,))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?)',
+                successes)
+            # Never let a failed retry overwrite an earlier successful post
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO postings SELECT ?, ?, ?, ? '
+                'WHERE NOT EXISTS (SELECT 1 FROM postings '
+                'WHERE product_key = ? AND status_code = 200)', failures)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,159 @@
+import datetime
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+
+DEFAULT_PRICE_STORE = os.environ.get('PDW_PRICE_STORE', '/tmp/pdw_prices')
+# Row groups this size keep a note's rows together for the min/max statistics
+ROW_GROUP_SIZE = 10000
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('note', pa.string()),
+        ('bid_price', pa.float64()),
+        ('captured_at', pa.timestamp('s')),
+    ])
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+
+class PriceStore:
+    """Daily mark-to-market bid prices of notes, as date-partitioned Parquet.
+
+    append() buffers observations and flush() writes each day's as one file
+    under date=YYYY-MM-DD, sorted by note, then merges that day's files with
+    compact().  history() only reads the partitions in the date range and
+    skips row groups whose note statistics rule them out, so a note's
+    valuations come back without reading the whole store.  root is a local
+    directory or an s3:// URI.
+    """
+
+    def __init__(self, root=DEFAULT_PRICE_STORE):
+        from pyarrow import fs
+
+        self.root = root
+        if '://' not in root:
+            os.makedirs(root, exist_ok=True)
+            root = os.path.abspath(root)
+            self.filesystem, self.path = fs.LocalFileSystem(), root
+        else:
+            self.filesystem, self.path = fs.FileSystem.from_uri(root)
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def _partition(self, date):
+        return f'{self.path}/date={date}'
+
+    def _write(self, frame, date, name=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame.sort_values(['note', 'captured_at']),
+                                     schema=_schema(), preserve_index=False)
+        directory = self._partition(date)
+        self.filesystem.create_dir(directory, recursive=True)
+        path = f'{directory}/{name or "part-" + uuid.uuid4().hex}.parquet'
+        pq.write_table(table, path, filesystem=self.filesystem, row_group_size=ROW_GROUP_SIZE)
+        return path
+
+    def append(self, prices, date=None, captured_at=None):
+        """Buffer {note: bid price} observed on date (a date or ISO string,
+        default today, UTC)."""
+        captured_at = captured_at or datetime.datetime.utcnow().replace(microsecond=0)
+        if isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        date = (date or captured_at.date()).isoformat()
+        rows = [(date, note, float(price), captured_at) for note, price in prices.items()
+                if price is not None and price == price]
+        with self._lock:
+            self._pending.extend(rows)
+
+    def flush(self, compact=True):
+        """Write the buffered prices, one file per date; returns the dates.
+
+        With compact, each of those dates is then merged into one file.  Only
+        compact when no other process is writing to the store.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return []
+        frame = pd.DataFrame(rows, columns=['date', 'note', 'bid_price', 'captured_at'])
+        dates = sorted(frame['date'].unique())
+        for date in dates:
+            with self._lock:
+                self._write(frame[frame['date'] == date].drop(columns='date'), date)
+            if compact:
+                self.compact(date)
+        return dates
+
+    def close(self):
+        self.flush()
+
+    def dates(self):
+        from pyarrow import fs
+
+        infos = self.filesystem.get_file_info(fs.FileSelector(self.path))
+        return sorted(info.base_name[len('date='):] for info in infos
+                      if info.type == fs.FileType.Directory and info.base_name.startswith('date='))
+
+    def compact(self, date):
+        """Merge a day's files into one, sorted by note."""
+        from pyarrow import fs
+
+        date = str(date)
+        with self._lock:
+            selector = fs.FileSelector(self._partition(date))
+            old = [info.path for info in self.filesystem.get_file_info(selector)
+                   if info.path.endswith('.parquet')]
+            if len(old) < 2:
+                return
+            frame = self._read(filter_date=(date, date))
+            self._write(frame.drop(columns='date'), date, 'compacted-' + uuid.uuid4().hex)
+            for path in old:
+                self.filesystem.delete_file(path)
+
+    def _read(self, notes=None, filter_date=None):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path, filesystem=self.filesystem, format='parquet',
+                             partitioning=_partitioning())
+        expression = None
+        conditions = []
+        if notes is not None:
+            conditions.append(ds.field('note').isin([str(note) for note in notes]))
+        if filter_date is not None:
+            start, end = filter_date
+            if start is not None:
+                conditions.append(ds.field('date') >= str(start))
+            if end is not None:
+                conditions.append(ds.field('date') <= str(end))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(filter=expression).to_pandas()
+
+    def history(self, notes, start=None, end=None):
+        """Bid prices of the notes between start and end dates (inclusive).
+
+        Returns one row per note and date, the last price captured that day.
+        """
+        if isinstance(notes, str):
+            notes = [notes]
+        if not self.dates():
+            return pd.DataFrame(columns=['note', 'date', 'bid_price', 'captured_at'])
+        frame = self._read(notes, (start, end))
+        frame['date'] = pd.to_datetime(frame['date'].astype(str))
+        frame = (frame.sort_values(['note', 'date', 'captured_at'])
+                 .drop_duplicates(['note', 'date'], keep='last'))
+        return frame[['note', 'date', 'bid_price', 'captured_at']].reset_index(drop=True)
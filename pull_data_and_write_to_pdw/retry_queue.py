@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+
+DEFAULT_QUEUE_PATH = os.environ.get('PDW_RETRY_QUEUE', '/tmp/pdw_retry_queue.sqlite')
+DEFAULT_MAX_ATTEMPTS = 5
+# Backoff doubles from BASE_BACKOFF after each failed attempt, capped at
+# MAX_BACKOFF (seconds)
+BASE_BACKOFF = 30
+MAX_BACKOFF = 60 * 60
+# Client errors that will fail the same way again go straight to dead letters
+RETRIABLE_CLIENT_STATUS = {401, 408, 409, 425, 429}
+
+
+def is_retriable(status_code):
+    """Whether a failed POST is worth sending again."""
+    if status_code is None:
+        # Timeouts and connection errors
+        return True
+    if 400 <= status_code < 500:
+        return status_code in RETRIABLE_CLIENT_STATUS
+    return True
+
+
+class RetryQueue:
+    """Durable queue of failed PDW posts with a dead-letter store."""
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS retry_queue (
+                    product_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    last_status INTEGER,
+                    last_error TEXT
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    product_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    last_status INTEGER,
+                    last_error TEXT,
+                    dead_at REAL NOT NULL
+                )
+            ''')
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM retry_queue').fetchone()[0]
+
+    def enqueue(self, key, product, status_code=None, error=None,
+                retry_after=None):
+        """Queue a failed post, or dead-letter it once it can't succeed.
+
+        retry_after (seconds, from a 429 or 503's Retry-After header) replaces
+        the backoff schedule for this attempt.
+        """
+        payload = product if isinstance(product, str) else json.dumps(product)
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                'SELECT attempts FROM retry_queue WHERE product_key = ?',
+                (key,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            if attempts >= self.max_attempts or not is_retriable(status_code):
+                self.conn.execute(
+                    'DELETE FROM retry_queue WHERE product_key = ?', (key,))
+                self.conn.execute(
+                    'INSERT INTO dead_letters VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, payload, attempts, status_code, error, now))
+                print(f'Product {key} moved to dead letters after '
+                      f'{attempts} attempt(s)')
+                return
+            backoff = min(BASE_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+            if retry_after is not None:
+                backoff = min(retry_after, MAX_BACKOFF)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO retry_queue VALUES (?, ?, ?, ?, ?, ?)',
+                (key, payload, attempts, now + backoff, status_code, error))
+
+    def remove(self, keys):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'DELETE FROM retry_queue WHERE product_key = ?',
+                [(key,) for key in keys])
+
+    def due(self, limit=None, now=None):
+        """Return {key: product} whose backoff has elapsed, oldest first."""
+        query = ('SELECT product_key, payload FROM retry_queue '
+                 'WHERE next_attempt_at <= ? ORDER BY next_attempt_at')
+        params = [now if now is not None else time.time()]
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return {key: json.loads(payload) for key, payload in rows}
+
+    def dead_letters(self):
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT product_key, payload, attempts, last_status, '
+                'last_error, dead_at FROM dead_letters').fetchall()
+        return [{
+            'key': key,
+            'product': json.loads(payload),
+            'attempts': attempts,
+            'last_status': last_status,
+            'last_error': last_error,
+            'dead_at': dead_at,
+        } for key, payload, attempts, last_status, last_error, dead_at in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def drain(queue, poster, limit=None, ignore_backoff=False):
+    """Re-send queued payloads that are due and return the post results."""
+    products = queue.due(limit=limit,
+                         now=float('inf') if ignore_backoff else None)
+    if not products:
+        print('Retry queue has nothing due')
+        return []
+    print(f'Draining {len(products)} queued product(s)')
+    # The poster removes successes and re-queues failures itself
+    return poster.post_products(products)
+
+
+if __name__ == '__main__':
+    # Usage: python retry_queue.py drain [--now]
+    from lambda_function import lambda_handler
+
+    if sys.argv[1:2] != ['drain']:
+        sys.exit('Usage: python retry_queue.py drain [--now]')
+    lambda_handler({'mode': 'drain', 'ignore_backoff': '--now' in sys.argv})
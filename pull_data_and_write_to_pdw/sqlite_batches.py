@@ -0,0 +1,14 @@
+# SQLite's default limit on host parameters is 999
+QUERY_BATCH_SIZE = 500
+
+
+def select_in(conn, query, values, params=()):
+    """Run query for values in batches and yield the rows.
+
+    query's '{}' is the placeholder list of its IN clause; params fill the
+    placeholders before it.
+    """
+    values = list(values)
+    for i in range(0, len(values), QUERY_BATCH_SIZE):
+        batch = values[i:i + QUERY_BATCH_SIZE]
+        yield from conn.execute(query.format(','.join('?' * len(batch))), list(params) + batch)
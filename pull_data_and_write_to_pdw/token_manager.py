@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from oauth_access_token import AUTH_SERVER_URL, request_token
+
+
+# /tmp survives between warm invocations of the same Lambda container
+DEFAULT_CACHE_PATH = '/tmp/pdw_oauth_token.json'
+# Refresh this many seconds before the token actually expires
+DEFAULT_REFRESH_MARGIN = 60
+# Used when the token response has no expires_in
+DEFAULT_EXPIRES_IN = 300
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def _client_key(client_id, client_secret, auth_server_url):
+    return hashlib.sha256(
+        '\n'.join((auth_server_url, client_id, client_secret)).encode()).hexdigest()
+
+
+class TokenManager:
+    """Cache a client-credentials token and refresh it shortly before expiry.
+
+    Only one thread refreshes at a time; concurrent callers wait for that
+    refresh and share its token.
+    """
+
+    def __init__(self, client_id, client_secret, cache_path=DEFAULT_CACHE_PATH,
+                 refresh_margin=DEFAULT_REFRESH_MARGIN,
+                 auth_server_url=AUTH_SERVER_URL):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.auth_server_url = auth_server_url
+        self._access_token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        # Don't hand one client's cached token to another, or to the same
+        # client once its secret has been rotated
+        self._cache_key = _client_key(client_id, client_secret, auth_server_url)
+
+    def _is_fresh(self):
+        return (self._access_token is not None
+                and time.time() < self._expires_at - self.refresh_margin)
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('client') == self._cache_key:
+            self._access_token = cached['access_token']
+            self._expires_at = cached['expires_at']
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'client': self._cache_key,
+                    'access_token': self._access_token,
+                    'expires_at': self._expires_at,
+                }, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f'Could not cache token at {self.cache_path}: {e}')
+
+    def _refresh(self):
+        tokens = request_token(self.client_id, self.client_secret,
+                               self.auth_server_url)
+        self._access_token = tokens['access_token']
+        self._expires_at = time.time() + float(
+            tokens.get('expires_in', DEFAULT_EXPIRES_IN))
+        self._save_cache()
+
+    def get_token(self):
+        """Return a valid access token, refreshing it only when needed."""
+        if self._is_fresh():
+            return self._access_token
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if not self._is_fresh():
+                self._load_cache()
+            if not self._is_fresh():
+                self._refresh()
+            return self._access_token
+
+    def invalidate(self, access_token):
+        """Drop a token the API rejected so the next get_token refreshes.
+
+        Only the rejected token is dropped, so a burst of 401s from
+        concurrent workers causes a single refresh.
+        """
+        with self._lock:
+            if self._access_token == access_token:
+                self._access_token = None
+                self._expires_at = 0
+                try:
+                    os.remove(self.cache_path)
+                except (OSError, TypeError):
+                    pass
+
+
+def get_token_manager(client_id, client_secret, **kwargs):
+    """Return the process-wide TokenManager for a client, secret and auth
+    server; a rotated secret gets a new manager."""
+    key = _client_key(client_id, client_secret, kwargs.get('auth_server_url', AUTH_SERVER_URL))
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = TokenManager(client_id, client_secret, **kwargs)
+        return _managers[key]
@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# The modules import each other by name, as they do when run from their folder
+MODULE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'pull_data_and_write_to_pdw')
+sys.path.insert(0, MODULE_DIR)
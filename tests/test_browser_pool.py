@@ -0,0 +1,38 @@
+import gc
+
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    current_url = 'about:blank'
+
+    def __init__(self, profile):
+        self.pool_profile = profile
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_release_reuses_and_close_quits():
+    pool = BrowserPool(2, browser_factory=FakeBrowser)
+    browser = pool.acquire()
+    pool.release(browser)
+    assert pool.acquire() is browser
+    pool.release(browser)
+    pool.close()
+    assert browser.quit_calls == 1
+
+
+def test_closed_pools_are_not_kept_alive_for_exit():
+    pool = BrowserPool(1, browser_factory=FakeBrowser)
+    assert pool in browser_pool._open_pools
+    pool.close()
+    assert pool not in browser_pool._open_pools
+
+    # An unclosed pool that's dropped isn't pinned until the process exits
+    open_pools = len(browser_pool._open_pools)
+    BrowserPool(1, browser_factory=FakeBrowser)
+    gc.collect()
+    assert len(browser_pool._open_pools) == open_pools
@@ -0,0 +1,38 @@
+from checkpoint import PipelineCheckpoint
+
+
+def test_pending_and_unposted(tmp_path):
+    checkpoint = PipelineCheckpoint(str(tmp_path / 'checkpoint.json'))
+    checkpoint.mark_discovered(['a', 'b', 'c'])
+    checkpoint.mark_scraped(['a', 'b'], {'A': {'x': 1}, 'B': {'x': 2}})
+    checkpoint.mark_posted(['A'])
+
+    assert checkpoint.pending_urls() == ['c']
+    assert checkpoint.unposted_products() == {'B': {'x': 2}}
+
+
+def test_resumes_from_file(tmp_path):
+    location = str(tmp_path / 'checkpoint.json')
+    checkpoint = PipelineCheckpoint(location)
+    checkpoint.mark_discovered(['a', 'b'])
+    checkpoint.mark_scraped(['a'], {'A': {}})
+    checkpoint.mark_crawl_complete()
+    checkpoint.save(force=True)
+
+    resumed = PipelineCheckpoint(location)
+    assert resumed.crawl_complete
+    assert resumed.is_discovered('b')
+    assert resumed.pending_urls() == ['b']
+    assert resumed.unposted_products() == {'A': {}}
+
+
+def test_clear(tmp_path):
+    location = tmp_path / 'checkpoint.json'
+    checkpoint = PipelineCheckpoint(str(location))
+    checkpoint.mark_discovered(['a'])
+    checkpoint.save(force=True)
+    checkpoint.clear()
+
+    assert not location.exists()
+    assert checkpoint.pending_urls() == []
+    assert not PipelineCheckpoint(str(location)).is_discovered('a')
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import MODULE_DIR
+
+
+# Modules the posting-only and replay-only paths must never load
+HEAVY_MODULES = ['pandas', 'selenium', 'pymongo', 'keyring', 'bs4', 'tqdm',
+                 'openpyxl', 'jsonschema']
+
+# (import statement, budget in seconds, whether heavy modules are allowed)
+BUDGETS = {
+    'entry point': ('import lambda_function', 0.05, False),
+    'post path': ('import lambda_function, pdw_poster, posting_ledger, '
+                  'retry_queue, token_manager, pdw_schema', 0.5, False),
+    'pipeline path': ('import lambda_function, pipeline, '
+                      'new_product_identifier', 3.0, True),
+}
+
+
+def measure_imports(statement):
+    """Run an import in a fresh interpreter and parse `-X importtime`.
+
+    Returns {outermost package: cumulative seconds} and the names of every
+    top-level package that was loaded.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=MODULE_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{statement!r} failed:\n{completed.stderr}')
+
+    costs = {}
+    loaded = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        loaded.add(name.strip().split('.')[0])
+        # Only charge each import to the module imported at the outermost
+        # level, which is indented by a single space
+        if len(name) - len(name.lstrip()) == 1:
+            package = name.strip().split('.')[0]
+            costs[package] = costs.get(package, 0) + int(cumulative) / 1e6
+    return costs, loaded
+
+
+@pytest.fixture(scope='module')
+def startup_packages():
+    # Don't charge interpreter startup (site, encodings, ...) to our modules
+    return set(measure_imports('pass')[0])
+
+
+@pytest.mark.parametrize('path', BUDGETS)
+def test_import_budget(path, startup_packages):
+    statement, budget, heavy_allowed = BUDGETS[path]
+    costs, loaded = measure_imports(statement)
+    costs = {p: c for p, c in costs.items() if p not in startup_packages}
+    total = sum(costs.values())
+    # Shown with -s: where the time went
+    print(f'{path}: {total * 1000:.1f}ms (budget {budget * 1000:.0f}ms)')
+    for package, cost in sorted(costs.items(), key=lambda c: -c[1])[:10]:
+        print(f'    {package:<28}{cost * 1000:>8.1f}ms')
+
+    assert total <= budget, f'{path} took {total * 1000:.1f}ms'
+    if not heavy_allowed:
+        assert not set(HEAVY_MODULES) & loaded, f'{path} imports heavy modules'
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from listing_snapshot import ListingSnapshot
+
+
+def listing(*rows):
+    return pd.DataFrame(rows, columns=['pdwCusip', 'Name'])
+
+
+def test_observe_returns_new_and_changed_rows(tmp_path):
+    snapshot = ListingSnapshot(str(tmp_path / 'snapshot.sqlite'))
+    changed, all_known = snapshot.observe('bmo', listing(('CA1', 'one'), ('CA2', 'two')))
+    assert list(changed['pdwCusip']) == ['CA1', 'CA2']
+    assert not all_known
+
+    changed, all_known = snapshot.observe('bmo', listing(('CA1', 'one'), ('CA2', 'TWO')))
+    assert list(changed['pdwCusip']) == ['CA2']
+    assert all_known
+
+
+def test_deferred_rows_wait_for_record(tmp_path):
+    path = str(tmp_path / 'snapshot.sqlite')
+    snapshot = ListingSnapshot(path, deferred=True)
+    snapshot.observe('bmo', listing(('CA1', 'one'), ('CA2', 'two')))
+    assert snapshot.known_hashes('bmo', ['CA1', 'CA2']) == {}
+
+    snapshot.record('bmo', ['CA1'])
+    assert set(snapshot.known_hashes('bmo', ['CA1', 'CA2'])) == {'CA1'}
+    snapshot.close()
+
+    # An unrecorded row is offered again by the next crawl
+    changed, _ = ListingSnapshot(path, deferred=True).observe(
+        'bmo', listing(('CA1', 'one'), ('CA2', 'two')))
+    assert list(changed['pdwCusip']) == ['CA2']
+
+
+def test_known_hashes_beyond_one_batch(tmp_path):
+    snapshot = ListingSnapshot(str(tmp_path / 'snapshot.sqlite'))
+    codes = [f'CA{i}' for i in range(1200)]
+    snapshot.observe('bmo', listing(*((code, code) for code in codes)))
+    assert len(snapshot.known_hashes('bmo', codes)) == 1200
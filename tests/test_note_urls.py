@@ -0,0 +1,35 @@
+from note_urls import NoteAliases, NoteDeduper, canonical_url
+
+
+def test_canonical_url():
+    assert canonical_url('HTTPS://WWW.BMONOTES.COM/note/jhn1234/') == \
+        'https://www.bmonotes.com/Note/JHN1234'
+    assert canonical_url('https://Example.com/p?b=2&a=1#top') == 'https://example.com/p?a=1&b=2'
+
+
+def test_deduper_drops_repeats_and_shared_identifiers():
+    deduper = NoteDeduper()
+    assert deduper.unique(['https://www.bmonotes.com/Note/jhn1',
+                           'https://www.bmonotes.com/Note/JHN1']) == \
+        ['https://www.bmonotes.com/Note/JHN1']
+    assert deduper.claim('https://example.com/a', ['CA123'])
+    assert deduper.claim('https://example.com/b', ['CA123']) is None
+    # 'Error' is what every unparseable listing code maps to, not an identifier
+    assert deduper.claim('https://example.com/c', ['Error'])
+    assert deduper.claim('https://example.com/d', ['Error'])
+
+
+def test_aliases_learned_from_pages(tmp_path):
+    path = str(tmp_path / 'aliases.sqlite')
+    deduper = NoteDeduper(NoteAliases(path))
+    deduper.claim('https://www.bmonotes.com/Note/CA06368AAA1', ['CA06368AAA1'])
+    # The JHN code's page shows the same cusip
+    assert deduper.same_note('https://www.bmonotes.com/Note/JHN7482', ['CA06368AAA1']) == \
+        'https://www.bmonotes.com/Note/CA06368AAA1'
+
+    # A later run resolves the alias before fetching
+    aliases = NoteAliases(path)
+    assert aliases.resolve(['JHN7482']) == {'JHN7482': 'CA06368AAA1'}
+    deduper = NoteDeduper(aliases)
+    assert deduper.claim('https://www.bmonotes.com/Note/CA06368AAA1', ['CA06368AAA1'])
+    assert deduper.claim('https://www.bmonotes.com/Note/JHN7482', ['JHN7482']) is None
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+import pdw_mongo
+from pdw_existence_query import PdwExistenceQuery
+from pdw_identifier_index import PdwIdentifierIndex
+
+
+pytest.importorskip('mongomock')
+
+
+@pytest.fixture
+def products(monkeypatch):
+    """PdwProductCore in an in-memory mongomock:// database."""
+    pdw_mongo.close_pdw_client()
+    monkeypatch.setattr(pdw_mongo, 'MONGO_URI', 'mongomock://')
+    yield pdw_mongo.pdw_products_collection()
+    pdw_mongo.close_pdw_client()
+
+
+def product(cusip, isin, created):
+    return {'createTimestamp': created,
+            'productGeneral': {'cusip': cusip, 'isin': isin, 'productName': cusip}}
+
+
+def test_mongomock_uri_gives_shared_in_memory_client(products):
+    assert type(pdw_mongo.get_pdw_client()).__module__.startswith('mongomock')
+    assert pdw_mongo.get_pdw_client() is pdw_mongo.get_pdw_client()
+
+
+def test_stream_projects_and_sorts(products):
+    start = datetime.datetime(2026, 1, 1)
+    products.insert_many([product(f'C{i}', f'CA{i}', start + datetime.timedelta(days=-i))
+                          for i in range(5)])
+    documents = list(pdw_mongo.stream(products, {}, ['productGeneral.cusip'],
+                                      sort=('createTimestamp', 1), batch_size=2))
+    assert documents == [{'productGeneral': {'cusip': f'C{i}'}} for i in reversed(range(5))]
+
+
+def test_existence_query(products):
+    products.insert_one(product('C1', 'CA1', datetime.datetime(2026, 1, 1)))
+    query = PdwExistenceQuery(batch_size=1)
+    assert query.known(['C1', 'CA1', 'C2']) == {'C1', 'CA1'}
+
+
+def test_identifier_index_sync(products, tmp_path):
+    start = datetime.datetime(2026, 1, 1)
+    products.insert_many([product('C1', 'CA1', start), product('C2', 'CA2', start)])
+    index = PdwIdentifierIndex(str(tmp_path / 'index.sqlite'))
+    assert index.sync() == 2
+    # Documents at the watermark are fetched again but aren't new
+    assert index.sync() == 0
+
+    products.insert_one(product('C3', 'CA3', start))
+    assert index.sync() == 1
+    assert index.known(['C1', 'CA3', 'C4']) == {'C1', 'CA3'}
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+import pipeline
+from checkpoint import PipelineCheckpoint
+from listing_snapshot import ListingSnapshot
+from new_product_identifier import Driver
+from pipeline import Pipeline
+
+
+LISTING = pd.DataFrame({
+    'JHN Code / Cusip': ['JHN1001', 'JHN1002'],
+    'pdwCusip': ['CAJHN1001', 'CAJHN1002'],
+})
+
+
+class EmptyPdw:
+    def known(self, identifiers):
+        return set()
+
+    def close(self):
+        pass
+
+
+class ListingDriver:
+    """One BMO listing page, read through the snapshot like the real crawl."""
+
+    compare_site_to_pdw = Driver.compare_site_to_pdw
+
+    def get_pdw_lookup(self, mode):
+        return EmptyPdw()
+
+    def iter_bmo_product_pages(self, snapshot=None):
+        yield LISTING if snapshot is None else snapshot.observe('bmo', LISTING)[0]
+
+
+class Poster:
+    def post_products(self, products):
+        return [{'key': key, 'success': True} for key in products]
+
+
+@pytest.fixture
+def failing_pages(monkeypatch):
+    """Scrape every note except the codes added to the returned set."""
+    failing = set()
+
+    def scrape_issuers(urls_by_issuer, deduper=None, fetchers=None, price_store=None):
+        result = {}
+        errors = {}
+        for issuer, urls in urls_by_issuer.items():
+            for url in urls:
+                code = url.rsplit('/', 1)[-1]
+                if code in failing:
+                    errors.setdefault(issuer, {})[(url, '__init__')] = 'page failed'
+                else:
+                    result[code] = {'code': code}
+        return result, errors
+
+    monkeypatch.setattr(pipeline, 'scrape_issuers', scrape_issuers)
+    monkeypatch.setattr(pipeline, 'validate_pdw_batch', lambda products: (products, {}))
+    monkeypatch.setattr(pipeline, 'print_validation_report', lambda errors: None)
+    return failing
+
+
+def run(tmp_path):
+    checkpoint = PipelineCheckpoint(str(tmp_path / 'checkpoint.json'))
+    snapshot = ListingSnapshot(str(tmp_path / 'snapshot.sqlite'), deferred=True)
+    summary = Pipeline(ListingDriver(), Poster(), checkpoint=checkpoint,
+                       listing_snapshot=snapshot).run()
+    recorded = set(snapshot.known_hashes('bmo', list(LISTING['pdwCusip'])))
+    snapshot.close()
+    return summary, recorded, checkpoint.pending_urls()
+
+
+def test_failed_note_stays_out_of_snapshot_and_pending(tmp_path, failing_pages):
+    failing_pages.add('JHN1002')
+    summary, recorded, pending = run(tmp_path)
+    assert summary['success'] == ['JHN1001']
+    assert recorded == {'CAJHN1001'}
+    assert pending == ['https://www.bmonotes.com/Note/JHN1002']
+
+    # Resumed from the checkpoint and failing again, its listing row must
+    # still not count as handled
+    summary, recorded, pending = run(tmp_path)
+    assert summary['success'] == []
+    assert recorded == {'CAJHN1001'}
+    assert pending == ['https://www.bmonotes.com/Note/JHN1002']
+
+
+def test_resumed_note_recorded_once_posted(tmp_path, failing_pages):
+    failing_pages.add('JHN1002')
+    run(tmp_path)
+
+    failing_pages.clear()
+    summary, recorded, pending = run(tmp_path)
+    assert summary['success'] == ['JHN1002']
+    assert recorded == {'CAJHN1001', 'CAJHN1002'}
+    assert pending == []
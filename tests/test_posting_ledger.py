@@ -0,0 +1,26 @@
+from posting_ledger import PostingLedger
+
+
+def product(isin, name):
+    return {'productGeneral': {'isin': isin, 'productName': name}}
+
+
+def test_skips_unchanged_posted_products(tmp_path):
+    ledger = PostingLedger(str(tmp_path / 'ledger.sqlite'))
+    ledger.record_many([(product('CA1', 'one'), 200), (product('CA2', 'two'), 500)])
+
+    to_post, skipped = ledger.filter_unposted({
+        'one': product('CA1', 'one'),
+        'two': product('CA2', 'two'),
+        'changed': product('CA1', 'ONE'),
+    })
+    assert skipped == ['one']
+    assert set(to_post) == {'two', 'changed'}
+
+
+def test_failure_never_overwrites_a_success(tmp_path):
+    ledger = PostingLedger(str(tmp_path / 'ledger.sqlite'))
+    ledger.record(product('CA1', 'one'), 200)
+    ledger.record(product('CA1', 'one'), 500)
+
+    assert ledger.filter_unposted({'one': product('CA1', 'one')}) == ({}, ['one'])
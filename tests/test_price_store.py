@@ -0,0 +1,38 @@
+import datetime
+
+import pytest
+
+from price_store import PriceStore
+
+
+pytest.importorskip('pyarrow')
+
+
+def test_append_flush_and_history(tmp_path):
+    store = PriceStore(str(tmp_path / 'prices'))
+    noon = datetime.datetime(2026, 3, 2, 12)
+    store.append({'JHN1': 101.5, 'JHN2': 99.0, 'JHN3': float('nan')}, captured_at=noon)
+    store.append({'JHN1': 102.0}, date='2026-03-02', captured_at=noon + datetime.timedelta(hours=1))
+    store.append({'JHN1': 100.0}, date=datetime.date(2026, 3, 1), captured_at=noon)
+    assert store.flush() == ['2026-03-01', '2026-03-02']
+    assert store.dates() == ['2026-03-01', '2026-03-02']
+
+    history = store.history('JHN1', start='2026-03-02')
+    assert list(history['bid_price']) == [102.0]
+    history = store.history(['JHN1', 'JHN2', 'JHN3'])
+    assert list(zip(history['note'], history['bid_price'])) == [
+        ('JHN1', 100.0), ('JHN1', 102.0), ('JHN2', 99.0)]
+
+
+def test_compact_merges_a_days_files(tmp_path):
+    store = PriceStore(str(tmp_path / 'prices'))
+    for hour in range(3):
+        store.append({'JHN1': 100.0 + hour}, date='2026-03-02',
+                     captured_at=datetime.datetime(2026, 3, 2, hour))
+        store.flush(compact=False)
+    partition = tmp_path / 'prices' / 'date=2026-03-02'
+    assert len(list(partition.glob('*.parquet'))) == 3
+
+    store.compact('2026-03-02')
+    assert len(list(partition.glob('*.parquet'))) == 1
+    assert list(store.history('JHN1')['bid_price']) == [102.0]
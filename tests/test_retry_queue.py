@@ -0,0 +1,38 @@
+import time
+
+from retry_queue import BASE_BACKOFF, MAX_BACKOFF, RetryQueue
+
+
+def test_backoff_and_due(tmp_path):
+    queue = RetryQueue(str(tmp_path / 'queue.sqlite'))
+    queue.enqueue('A', {'x': 1}, status_code=500)
+    assert len(queue) == 1
+    assert queue.due() == {}
+    assert queue.due(now=time.time() + BASE_BACKOFF + 1) == {'A': {'x': 1}}
+
+    queue.remove(['A'])
+    assert len(queue) == 0
+
+
+def test_retry_after_replaces_backoff(tmp_path):
+    queue = RetryQueue(str(tmp_path / 'queue.sqlite'))
+    queue.enqueue('A', {}, status_code=429, retry_after=2)
+    queue.enqueue('B', {}, status_code=503, retry_after=10 * MAX_BACKOFF)
+    now = time.time()
+    assert set(queue.due(now=now + 3)) == {'A'}
+    assert set(queue.due(now=now + MAX_BACKOFF + 1)) == {'A', 'B'}
+
+
+def test_dead_letters(tmp_path):
+    queue = RetryQueue(str(tmp_path / 'queue.sqlite'), max_attempts=2)
+    # A client error that will fail the same way again
+    queue.enqueue('A', {'x': 1}, status_code=400, error='bad payload')
+    # Out of attempts
+    queue.enqueue('B', {}, status_code=500)
+    queue.enqueue('B', {}, status_code=500)
+
+    assert len(queue) == 0
+    dead = {letter['key']: letter for letter in queue.dead_letters()}
+    assert set(dead) == {'A', 'B'}
+    assert dead['A']['last_error'] == 'bad payload'
+    assert dead['B']['attempts'] == 2
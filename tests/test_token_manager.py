@@ -0,0 +1,26 @@
+import token_manager
+from token_manager import TokenManager, get_token_manager
+
+
+def test_manager_per_client_secret_and_server():
+    manager = get_token_manager('client', 'secret', cache_path=None)
+    assert get_token_manager('client', 'secret', cache_path=None) is manager
+    assert get_token_manager('client', 'rotated', cache_path=None) is not manager
+    assert get_token_manager('client', 'secret', cache_path=None,
+                             auth_server_url='http://localhost/auth') is not manager
+
+
+def test_cached_token_not_reused_after_secret_rotation(tmp_path, monkeypatch):
+    issued = []
+
+    def request_token(client_id, client_secret, auth_server_url):
+        issued.append(client_secret)
+        return {'access_token': f'token-{len(issued)}', 'expires_in': 3600}
+
+    monkeypatch.setattr(token_manager, 'request_token', request_token)
+    cache_path = str(tmp_path / 'token.json')
+    assert TokenManager('client', 'secret', cache_path).get_token() == 'token-1'
+    # A new container with the same secret reuses the cached token
+    assert TokenManager('client', 'secret', cache_path).get_token() == 'token-1'
+    assert TokenManager('client', 'rotated', cache_path).get_token() == 'token-2'
+    assert issued == ['secret', 'rotated']